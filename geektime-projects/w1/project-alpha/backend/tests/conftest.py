@@ -1,9 +1,8 @@
 import os
 
 import pytest
-import sqlalchemy as sa
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, make_url
 from sqlalchemy.orm import sessionmaker
 
 from app.database import Base, get_db
@@ -12,12 +11,30 @@ from app.models.ticket import TicketStatus
 
 # 使用环境变量中的数据库URL，如果没有则使用SQLite
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
+# 只解析一次 URL 取后端名（如 "postgresql+psycopg2" -> "postgresql"），避免密码中含 "sqlite" 时误判
+DB_SCHEME = make_url(SQLALCHEMY_DATABASE_URL).get_backend_name()
 
 # SQLite需要特殊的connect_args，PostgreSQL不需要
-connect_args = {"check_same_thread": False} if "sqlite" in SQLALCHEMY_DATABASE_URL else {}
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args=connect_args)
+connect_args = {"check_same_thread": False} if DB_SCHEME == "sqlite" else {}
+# 检出连接前先 ping，并定期回收连接，避免长时间运行的测试会话用到已断开的连接
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args=connect_args,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+if DB_SCHEME == "sqlite":
+    # pysqlite 默认的事务处理不支持 SAVEPOINT，改由 SQLAlchemy 显式发出 BEGIN
+    @event.listens_for(engine, "connect")
+    def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
 
 # Module-scoped fixture for database setup
 # For PostgreSQL, we assume migrations have been run externally
@@ -25,7 +42,7 @@ TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engin
 @pytest.fixture(scope="session", autouse=True)
 def setup_database():
     """Setup database once for all tests"""
-    if "sqlite" in SQLALCHEMY_DATABASE_URL:
+    if DB_SCHEME == "sqlite":
         # SQLite: 创建表
         Base.metadata.create_all(bind=engine)
         yield
@@ -35,26 +52,25 @@ def setup_database():
         yield
 
 
+@pytest.fixture(scope="session")
+def connection(setup_database):
+    """整个测试会话共享一个数据库连接"""
+    connection = engine.connect()
+    yield connection
+    connection.close()
+
+
 @pytest.fixture(scope="function")
-def db():
-    # 获取数据库连接
-    db = TestingSessionLocal()
+def db(connection):
+    # 每个测试运行在外层事务中，结束时回滚，无需逐表清理数据
+    # 业务代码中的 commit/rollback 只作用于 SAVEPOINT
+    transaction = connection.begin()
+    db = TestingSessionLocal(bind=connection, join_transaction_mode="create_savepoint")
     try:
         yield db
     finally:
-        # 清理数据
-        if "postgresql" in SQLALCHEMY_DATABASE_URL:
-            # PostgreSQL: 使用TRUNCATE清理数据（保留表结构和触发器）
-            db.execute(
-                sa.text("TRUNCATE TABLE ticket_tags, tickets, tags RESTART IDENTITY CASCADE")
-            )
-            db.commit()
-        else:
-            # SQLite: 删除所有数据
-            for table in reversed(Base.metadata.sorted_tables):
-                db.execute(table.delete())
-            db.commit()
         db.close()
+        transaction.rollback()
 
 
 @pytest.fixture(scope="function")
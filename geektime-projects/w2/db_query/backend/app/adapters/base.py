@@ -1,6 +1,7 @@
 """Abstract base class for database adapters."""
 
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Sequence
 from typing import Any
 
 from pydantic import BaseModel
@@ -10,7 +11,7 @@ class Connection:
     """Database connection wrapper.
 
     Attributes:
-        connection: The underlying database connection
+        connection: The underlying connection pool (use ``acquire()`` to get a connection)
         db_type: Database type identifier
     """
 
@@ -18,7 +19,7 @@ class Connection:
         """Initialize connection wrapper.
 
         Args:
-            connection: The database connection object
+            connection: The database connection pool
             db_type: Database type (postgresql, mysql)
         """
         self.connection = connection
@@ -78,15 +79,17 @@ class QueryResult(BaseModel):
 
     Attributes:
         columns: List of column names
-        rows: List of data rows (as dictionaries)
+        rows: List of data rows (values in ``columns`` order)
         row_count: Number of rows
         execution_time_ms: Execution time in milliseconds
+        truncated: Whether rows were cut off at the row limit
     """
 
     columns: list[str]
-    rows: list[dict[str, Any]]
+    rows: list[list[Any]]
     row_count: int
     execution_time_ms: int
+    truncated: bool = False
 
 
 class DatabaseAdapter(ABC):
@@ -96,6 +99,9 @@ class DatabaseAdapter(ABC):
     Follows SOLID principles - Open/Closed for extensibility.
     """
 
+    # sqlglot dialect used to validate SQL sent to this database type
+    SQL_DIALECT = ""
+
     def __init__(self, db_type: str) -> None:
         """Initialize the adapter.
 
@@ -108,6 +114,9 @@ class DatabaseAdapter(ABC):
     async def connect(self, url: str) -> Connection:
         """Establish a database connection.
 
+        Connections are pooled per URL; repeated calls reuse the same pool
+        without contacting the server, so use ``ping`` to test reachability.
+
         Args:
             url: Database connection URL
 
@@ -119,6 +128,33 @@ class DatabaseAdapter(ABC):
         """
         pass
 
+    @abstractmethod
+    async def ping(self, url: str) -> None:
+        """Check that the server is reachable.
+
+        Opens a one-off connection outside the pool and runs ``SELECT 1``, so
+        a cached pool cannot report success for a server that is down.
+
+        Args:
+            url: Database connection URL
+
+        Raises:
+            Exception: If the server cannot be reached
+        """
+        pass
+
+    async def close_pool(self, url: str) -> None:
+        """Close and forget the connection pool for one URL, if any.
+
+        Args:
+            url: Database connection URL
+        """
+        pass
+
+    async def close_pools(self) -> None:
+        """Close all connection pools opened by this adapter type."""
+        pass
+
     @abstractmethod
     async def get_metadata(self, connection: Connection) -> DatabaseMetadata:
         """Extract database metadata.
@@ -140,13 +176,17 @@ class DatabaseAdapter(ABC):
         connection: Connection,
         sql: str,
         timeout: int = 60,
+        max_rows: int = 10_000,
     ) -> QueryResult:
         """Execute a SELECT query.
 
+        Rows are streamed from the server and reading stops at ``max_rows``.
+
         Args:
             connection: Database connection
             sql: SQL query to execute
             timeout: Query timeout in seconds
+            max_rows: Maximum number of rows to return
 
         Returns:
             QueryResult with data
@@ -155,3 +195,30 @@ class DatabaseAdapter(ABC):
             Exception: If query execution fails
         """
         pass
+
+    @abstractmethod
+    def stream_query(
+        self,
+        connection: Connection,
+        sql: str,
+        timeout: int = 60,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[tuple[list[str], Sequence[Sequence[Any]]]]:
+        """Stream a SELECT query in batches.
+
+        At least one (possibly empty) batch is yielded so callers always see
+        the column names.
+
+        Args:
+            connection: Database connection
+            sql: SQL query to execute
+            timeout: Query timeout in seconds
+            batch_size: Number of rows fetched per batch
+
+        Yields:
+            Tuple of (columns, rows) per batch
+
+        Raises:
+            Exception: If query execution fails
+        """
+        pass
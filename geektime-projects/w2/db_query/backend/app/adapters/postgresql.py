@@ -2,7 +2,10 @@
 
 import asyncio
 import time
-from datetime import datetime
+from collections.abc import AsyncIterator, Sequence
+from datetime import UTC, datetime
+from itertools import groupby
+from typing import Any
 
 import asyncpg
 
@@ -15,6 +18,70 @@ from app.adapters.base import (
     TableMetadata,
 )
 
+# Process-wide connection pools keyed by URL. Each URL gets its own creation
+# lock so a slow or unreachable host does not hold up other databases.
+_pools: dict[str, asyncpg.Pool] = {}
+_pool_locks: dict[str, asyncio.Lock] = {}
+
+# information_schema table types we expose, mapped to our format
+_TYPE_MAP = {"BASE TABLE": "table", "VIEW": "view"}
+
+# All tables/views with their columns and primary key flags, in one round-trip
+METADATA_QUERY = """
+    WITH pks AS (
+        SELECT kcu.table_schema, kcu.table_name, kcu.column_name
+        FROM information_schema.table_constraints tc
+        JOIN information_schema.key_column_usage kcu
+            ON tc.constraint_name = kcu.constraint_name
+            AND tc.table_schema = kcu.table_schema
+            AND tc.table_name = kcu.table_name
+        WHERE tc.constraint_type = 'PRIMARY KEY'
+    )
+    SELECT
+        t.table_schema,
+        t.table_name,
+        t.table_type,
+        c.column_name,
+        c.data_type,
+        c.is_nullable,
+        pks.column_name IS NOT NULL AS is_primary_key
+    FROM information_schema.tables t
+    LEFT JOIN information_schema.columns c
+        ON c.table_schema = t.table_schema
+        AND c.table_name = t.table_name
+    LEFT JOIN pks
+        ON pks.table_schema = c.table_schema
+        AND pks.table_name = c.table_name
+        AND pks.column_name = c.column_name
+    WHERE t.table_schema NOT IN ('pg_catalog', 'information_schema')
+    ORDER BY t.table_schema, t.table_name, c.ordinal_position
+"""
+
+
+async def _stream_rows(
+    conn: asyncpg.Connection, sql: str, max_rows: int, timeout: int
+) -> tuple[list[str], list[list[Any]], bool]:
+    """Read up to ``max_rows`` rows through a server-side cursor.
+
+    The server enforces ``timeout`` through statement_timeout, so a slow query
+    is cancelled cleanly and the connection can go back to the pool.
+
+    Returns:
+        Tuple of (columns, rows, truncated)
+    """
+    # Cursors only live inside a transaction
+    async with conn.transaction(readonly=True):
+        # SET LOCAL only lasts until the end of this transaction
+        await conn.execute(f"SET LOCAL statement_timeout = {int(timeout * 1000)}")
+        stmt = await conn.prepare(sql, timeout=timeout)
+        columns = [attr.name for attr in stmt.get_attributes()]
+        cursor = await stmt.cursor(timeout=timeout)
+        # One bulk fetch; the extra row tells us whether the result was cut off
+        records = await cursor.fetch(max_rows + 1, timeout=timeout)
+
+    rows = [list(record) for record in records[:max_rows]]
+    return columns, rows, len(records) > max_rows
+
 
 class PostgreSQLAdapter(DatabaseAdapter):
     """PostgreSQL database adapter.
@@ -22,6 +89,8 @@ class PostgreSQLAdapter(DatabaseAdapter):
     Implements DatabaseAdapter for PostgreSQL databases.
     """
 
+    SQL_DIALECT = "postgres"
+
     def __init__(self, db_type: str = "postgresql") -> None:
         """Initialize PostgreSQL adapter.
 
@@ -42,15 +111,68 @@ class PostgreSQLAdapter(DatabaseAdapter):
         Raises:
             Exception: If connection fails
         """
+        try:
+            pool = _pools.get(url)
+            if pool is None:
+                async with _pool_locks.setdefault(url, asyncio.Lock()):
+                    pool = _pools.get(url)
+                    if pool is None:
+                        # Each pooled connection keeps an LRU of prepared statements,
+                        # so repeated metadata/query SQL skips parse and plan
+                        pool = await asyncpg.create_pool(
+                            url,
+                            min_size=1,
+                            max_size=10,
+                            statement_cache_size=1024,
+                        )
+                        _pools[url] = pool
+            return Connection(connection=pool, db_type=self.db_type)
+        except Exception as e:
+            raise Exception(f"PostgreSQL 连接失败: {str(e)}") from e
+
+    async def ping(self, url: str) -> None:
+        """Check that a PostgreSQL server is reachable.
+
+        Args:
+            url: PostgreSQL connection URL
+
+        Raises:
+            Exception: If the server cannot be reached
+        """
         try:
             conn = await asyncpg.connect(url)
-            return Connection(connection=conn, db_type=self.db_type)
+            try:
+                await conn.fetchval("SELECT 1")
+            finally:
+                await conn.close()
         except Exception as e:
             raise Exception(f"PostgreSQL 连接失败: {str(e)}") from e
 
+    async def close_pool(self, url: str) -> None:
+        """Close and forget the PostgreSQL pool for one URL, if any.
+
+        Args:
+            url: PostgreSQL connection URL
+        """
+        _pool_locks.pop(url, None)
+        pool = _pools.pop(url, None)
+        if pool is not None:
+            await pool.close()
+
+    async def close_pools(self) -> None:
+        """Close all PostgreSQL connection pools."""
+        pools = list(_pools.values())
+        _pools.clear()
+        _pool_locks.clear()
+        for pool in pools:
+            await pool.close()
+
     async def get_metadata(self, connection: Connection) -> DatabaseMetadata:
         """Extract PostgreSQL database metadata.
 
+        Tables, columns and primary keys are fetched with a single query and
+        grouped per table in Python.
+
         Args:
             connection: Database connection
 
@@ -60,75 +182,39 @@ class PostgreSQLAdapter(DatabaseAdapter):
         Raises:
             Exception: If metadata extraction fails
         """
-        conn: asyncpg.Connection = connection.connection
+        pool: asyncpg.Pool = connection.connection
 
         try:
-            tables: list[TableMetadata] = []
-
-            # Get all tables and views
-            query = """
-                SELECT
-                    table_schema,
-                    table_name,
-                    table_type
-                FROM information_schema.tables
-                WHERE table_schema NOT IN ('pg_catalog', 'information_schema')
-                ORDER BY table_schema, table_name
-            """
-
-            rows = await conn.fetch(query)
+            # Independent queries run on separate pooled connections
+            rows, db_name = await asyncio.gather(
+                pool.fetch(METADATA_QUERY),
+                pool.fetchval("SELECT current_database()"),
+            )
 
-            for row in rows:
-                schema_name = row["table_schema"]
-                table_name = row["table_name"]
-                table_type = row["table_type"]
+            tables: list[TableMetadata] = []
 
+            for (schema_name, table_name, table_type), table_rows in groupby(
+                rows, key=lambda r: (r["table_schema"], r["table_name"], r["table_type"])
+            ):
                 # Map table_type to our format
-                if table_type == "BASE TABLE":
-                    our_table_type = "table"
-                elif table_type == "VIEW":
-                    our_table_type = "view"
-                else:
+                our_table_type = _TYPE_MAP.get(table_type)
+                if our_table_type is None:
                     continue
 
-                # Get column information
-                column_query = """
-                    SELECT
-                        c.column_name,
-                        c.data_type,
-                        c.is_nullable,
-                        CASE WHEN pk.column_name IS NOT NULL THEN 'true' ELSE 'false' END AS is_primary_key
-                    FROM information_schema.columns c
-                    LEFT JOIN (
-                        SELECT ku.column_name, kc.table_schema, kc.table_name
-                        FROM information_schema.table_constraints tc
-                        JOIN information_schema.key_column_usage ku
-                            ON tc.constraint_name = ku.constraint_name
-                        JOIN information_schema.key_column_usage kc
-                            ON tc.constraint_name = kc.constraint_name
-                        WHERE tc.constraint_type = 'PRIMARY KEY'
-                    ) pk ON c.column_name = pk.column_name
-                        AND c.table_schema = pk.table_schema
-                        AND c.table_name = pk.table_name
-                    WHERE c.table_schema = $1
-                        AND c.table_name = $2
-                    ORDER BY c.ordinal_position
-                """
-
-                columns_result = await conn.fetch(column_query, schema_name, table_name)
-
+                # Values come straight from information_schema; skip validation
                 columns = [
-                    ColumnMetadata(
+                    ColumnMetadata.model_construct(
                         column_name=col["column_name"],
                         data_type=col["data_type"],
                         is_nullable=col["is_nullable"] == "YES",
-                        is_primary_key=col["is_primary_key"] == "true",
+                        is_primary_key=col["is_primary_key"],
                     )
-                    for col in columns_result
+                    for col in table_rows
+                    if col["column_name"] is not None
                 ]
 
                 tables.append(
-                    TableMetadata(
+                    TableMetadata.model_construct(
                         schema_name=schema_name,
                         table_name=table_name,
                         table_type=our_table_type,
@@ -136,14 +222,11 @@ class PostgreSQLAdapter(DatabaseAdapter):
                     )
                 )
 
-            # Extract database name from connection
-            db_name: str = await conn.fetchval("SELECT current_database()")
-
-            return DatabaseMetadata(
+            return DatabaseMetadata.model_construct(
                 db_name=db_name,
                 db_type=self.db_type,
                 tables=tables,
-                metadata_extracted_at=datetime.utcnow().isoformat(),
+                metadata_extracted_at=datetime.now(UTC).isoformat(),
             )
 
         except Exception as e:
@@ -154,13 +237,18 @@ class PostgreSQLAdapter(DatabaseAdapter):
         connection: Connection,
         sql: str,
         timeout: int = 60,
+        max_rows: int = 10_000,
     ) -> QueryResult:
         """Execute a SELECT query on PostgreSQL.
 
+        Rows are read through a server-side cursor so at most ``max_rows``
+        rows are held in memory.
+
         Args:
             connection: Database connection
             sql: SQL query to execute
             timeout: Query timeout in seconds
+            max_rows: Maximum number of rows to return
 
         Returns:
             QueryResult with data
@@ -168,35 +256,68 @@ class PostgreSQLAdapter(DatabaseAdapter):
         Raises:
             Exception: If query execution fails
         """
-        conn: asyncpg.Connection = connection.connection
+        pool: asyncpg.Pool = connection.connection
 
         try:
-            start_time = time.time()
+            async with pool.acquire() as conn:
+                start_time = time.time()
 
-            # Execute query with timeout
-            result = await asyncio.wait_for(
-                conn.fetch(sql),
-                timeout=timeout,
-            )
+                # Execute query with server-side timeout
+                columns, rows, truncated = await _stream_rows(conn, sql, max_rows, timeout)
 
-            execution_time = int((time.time() - start_time) * 1000)
-
-            # Get column names
-            if result:
-                columns = list(result[0].keys())
-                rows = [dict(row) for row in result]
-            else:
-                columns = []
-                rows = []
-
-            return QueryResult(
-                columns=columns,
-                rows=rows,
-                row_count=len(rows),
-                execution_time_ms=execution_time,
-            )
+                execution_time = int((time.time() - start_time) * 1000)
+
+                # Rows come straight from the driver; skip per-row revalidation
+                return QueryResult.model_construct(
+                    columns=columns,
+                    rows=rows,
+                    row_count=len(rows),
+                    execution_time_ms=execution_time,
+                    truncated=truncated,
+                )
+
+        except (TimeoutError, asyncpg.QueryCanceledError):
+            raise Exception(f"查询超时（超过 {timeout} 秒）") from None
+        except Exception as e:
+            raise Exception(f"查询执行失败: {str(e)}") from e
+
+    async def stream_query(
+        self,
+        connection: Connection,
+        sql: str,
+        timeout: int = 60,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[tuple[list[str], Sequence[Sequence[Any]]]]:
+        """Stream a SELECT query on PostgreSQL in batches.
+
+        Args:
+            connection: Database connection
+            sql: SQL query to execute
+            timeout: Query timeout in seconds
+            batch_size: Number of rows fetched per batch
 
-        except TimeoutError:
+        Yields:
+            Tuple of (columns, rows) per batch
+
+        Raises:
+            Exception: If query execution fails
+        """
+        pool: asyncpg.Pool = connection.connection
+
+        try:
+            async with pool.acquire() as conn, conn.transaction(readonly=True):
+                await conn.execute(f"SET LOCAL statement_timeout = {int(timeout * 1000)}")
+                stmt = await conn.prepare(sql, timeout=timeout)
+                columns = [attr.name for attr in stmt.get_attributes()]
+                cursor = await stmt.cursor(timeout=timeout)
+
+                while True:
+                    batch = await cursor.fetch(batch_size, timeout=timeout)
+                    yield columns, batch
+                    if len(batch) < batch_size:
+                        break
+
+        except (TimeoutError, asyncpg.QueryCanceledError):
             raise Exception(f"查询超时（超过 {timeout} 秒）") from None
         except Exception as e:
             raise Exception(f"查询执行失败: {str(e)}") from e
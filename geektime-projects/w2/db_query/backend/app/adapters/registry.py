@@ -8,9 +8,10 @@ class AdapterRegistry:
 
     Follows Registry pattern for managing adapter instances.
     Enables adding new database types without modifying existing code (Open/Closed Principle).
+    Adapters are stateless, so one shared instance is kept per database type.
     """
 
-    _adapters: dict[str, type[DatabaseAdapter]] = {}
+    _instances: dict[str, DatabaseAdapter] = {}
 
     @classmethod
     def register(cls, db_type: str, adapter_class: type[DatabaseAdapter]) -> None:
@@ -20,7 +21,7 @@ class AdapterRegistry:
             db_type: Database type identifier (e.g., "postgresql", "mysql")
             adapter_class: Adapter class to register
         """
-        cls._adapters[db_type] = adapter_class
+        cls._instances[db_type] = adapter_class(db_type=db_type)
 
     @classmethod
     def get_adapter(cls, db_type: str) -> DatabaseAdapter:
@@ -30,17 +31,23 @@ class AdapterRegistry:
             db_type: Database type identifier
 
         Returns:
-            DatabaseAdapter instance
+            Shared DatabaseAdapter instance
 
         Raises:
             ValueError: If database type is not supported
         """
-        adapter_class = cls._adapters.get(db_type)
-        if not adapter_class:
-            supported = ", ".join(cls._adapters.keys())
+        adapter = cls._instances.get(db_type)
+        if adapter is None:
+            supported = ", ".join(cls._instances.keys())
             raise ValueError(f"Unsupported database type: {db_type}. " f"Supported types: {supported}")
 
-        return adapter_class(db_type=db_type)
+        return adapter
+
+    @classmethod
+    async def close_all(cls) -> None:
+        """Close connection pools held by all registered adapters."""
+        for adapter in cls._instances.values():
+            await adapter.close_pools()
 
     @classmethod
     def supported_types(cls) -> list[str]:
@@ -49,7 +56,7 @@ class AdapterRegistry:
         Returns:
             List of database type identifiers
         """
-        return list(cls._adapters.keys())
+        return list(cls._instances.keys())
 
 
 # Register built-in adapters
@@ -1,6 +1,7 @@
 """API endpoints for database management."""
 
-from fastapi import APIRouter, HTTPException, Path, Query, status
+from cachetools import TTLCache
+from fastapi import APIRouter, Header, HTTPException, Path, Query, Response, status
 
 from app.core.db import db_manager
 from app.models.database import (
@@ -10,13 +11,28 @@ from app.models.database import (
 )
 from app.models.metadata import DatabaseMetadataResponse
 from app.services.database_service import DatabaseService
+from app.services.llm_service import invalidate_schema_cache
 from app.services.metadata_service import MetadataService
+from app.utils.http_cache import etag_matches, make_etag
 from app.utils.logging import logger
 
+# Keep the default response class: with a response_model set, FastAPI serializes
+# straight to JSON bytes via Pydantic, a fast path that custom classes like
+# ORJSONResponse turn off
 router = APIRouter(prefix="/dbs", tags=["databases"])
 database_service = DatabaseService()
 metadata_service = MetadataService()
 
+# In-process metadata cache in front of the SQLite cache, keyed by database name
+_metadata_cache: TTLCache[str, DatabaseMetadataResponse] = TTLCache(maxsize=1024, ttl=60)
+
+
+def _tag_metadata(response: Response, metadata: DatabaseMetadataResponse) -> DatabaseMetadataResponse:
+    """Attach the metadata ETag and revalidation headers to a response."""
+    response.headers["ETag"] = make_etag(metadata.database_name, metadata.metadata_extracted_at)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return metadata
+
 
 @router.get(
     "",
@@ -125,17 +141,24 @@ async def add_database(
     description="获取数据库的结构信息（表、视图、列），支持缓存和刷新",
 )
 async def get_database_metadata(
+    response: Response,
     name: str = Path(..., description="数据库名称"),
     refresh: bool = Query(False, description="是否强制刷新元数据"),
-) -> DatabaseMetadataResponse:
+    if_none_match: str | None = Header(None),
+) -> DatabaseMetadataResponse | Response:
     """Get database metadata with caching.
 
+    Responses carry an ETag derived from the extraction timestamp, so clients
+    can revalidate against the in-process cache and get 304 Not Modified.
+
     Args:
+        response: Response used to set caching headers
         name: Database connection name
         refresh: Whether to force refresh metadata from database
+        if_none_match: ETag of the metadata the client already holds
 
     Returns:
-        DatabaseMetadataResponse with tables and columns
+        DatabaseMetadataResponse with tables and columns, or 304 Not Modified
 
     Raises:
         HTTPException: If database doesn't exist or retrieval fails
@@ -143,32 +166,42 @@ async def get_database_metadata(
     try:
         if refresh:
             # Force refresh from database
-            return await metadata_service.refresh_metadata(name)
+            _metadata_cache.pop(name, None)
+            invalidate_schema_cache(name)
+            metadata = await metadata_service.refresh_metadata(name)
+            _metadata_cache[name] = metadata.model_copy(update={"is_cached": True})
+            return _tag_metadata(response, metadata)
         else:
+            # Serve from the in-process cache when possible
+            hit = _metadata_cache.get(name)
+            if hit is not None:
+                etag = make_etag(hit.database_name, hit.metadata_extracted_at)
+                if etag_matches(if_none_match, etag):
+                    return Response(
+                        status_code=status.HTTP_304_NOT_MODIFIED,
+                        headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+                    )
+                return _tag_metadata(response, hit)
+
             # Try to get cached metadata first
             cached = await metadata_service.get_cached_metadata(name)
 
             if cached:
-                return cached
+                _metadata_cache[name] = cached
+                return _tag_metadata(response, cached)
 
             # No cache, extract and store
             # Get database connection info
-            import aiosqlite
-
-            async with aiosqlite.connect(db_manager.db_path) as conn:
-                cursor = await conn.execute(
-                    "SELECT url, db_type FROM databases WHERE name = ?",
-                    (name,),
-                )
-                row = await cursor.fetchone()
-
-                if not row:
-                    raise ValueError(f"数据库 '{name}' 不存在")
+            info = await db_manager.get_database_info(name)
+            if info is None:
+                raise ValueError(f"数据库 '{name}' 不存在")
 
-                url = row[0]
-                db_type = row[1]
+            url, db_type = info
 
-            return await metadata_service.extract_metadata(name, url, db_type)
+            metadata = await metadata_service.extract_metadata(name, url, db_type)
+            invalidate_schema_cache(name)
+            _metadata_cache[name] = metadata.model_copy(update={"is_cached": True})
+            return _tag_metadata(response, metadata)
 
     except ValueError as e:
         raise HTTPException(
@@ -202,6 +235,8 @@ async def delete_database(
     """
     try:
         await database_service.delete_database(name)
+        _metadata_cache.pop(name, None)
+        invalidate_schema_cache(name)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
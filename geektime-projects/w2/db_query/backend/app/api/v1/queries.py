@@ -1,7 +1,9 @@
 """API endpoints for query execution."""
 
-from fastapi import APIRouter, HTTPException, Path, status
-from fastapi.responses import Response
+from functools import lru_cache
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, status
+from fastapi.responses import Response, StreamingResponse
 
 from app.models.query import (
     ExecuteQueryRequest,
@@ -10,12 +12,33 @@ from app.models.query import (
     QueryResult,
 )
 from app.services.llm_service import LLMService
-from app.services.query_service import QueryService
+from app.services.query_service import RESULT_CACHE_TTL, QueryService, query_result_cache
+from app.utils.http_cache import etag_matches, make_etag
 from app.utils.logging import logger
 
+# Default response class on purpose, as on the databases router: Pydantic's
+# JSON serializer already runs in Rust, so ORJSONResponse would add nothing
 router = APIRouter(prefix="/dbs", tags=["queries"])
-query_service = QueryService()
-llm_service = LLMService()
+
+
+@lru_cache
+def get_query_service() -> QueryService:
+    """Get the shared QueryService instance.
+
+    Returns:
+        QueryService singleton
+    """
+    return QueryService()
+
+
+@lru_cache
+def get_llm_service() -> LLMService:
+    """Get the shared LLMService instance.
+
+    Returns:
+        LLMService singleton
+    """
+    return LLMService()
 
 
 @router.post(
@@ -27,21 +50,43 @@ llm_service = LLMService()
 async def execute_query(
     name: str = Path(..., description="数据库连接名称"),
     request: ExecuteQueryRequest = None,
-) -> QueryResult:
+    query_service: QueryService = Depends(get_query_service),
+    if_none_match: str | None = Header(None),
+) -> Response:
     """Execute SQL query on database.
 
+    The result is serialized directly instead of being revalidated against
+    ``response_model``, which would walk every row again. Serialized results
+    are reused for a short time and tagged with an ETag derived from the
+    serialized body, so a 304 always means the client holds the same data.
+
     Args:
         name: Database connection name
         request: Query request with SQL
+        query_service: Injected query service
+        if_none_match: ETag of the result the client already holds
 
     Returns:
-        QueryResult with execution results
+        JSON-encoded QueryResult with execution results, or 304 Not Modified
 
     Raises:
         HTTPException: If validation or execution fails
     """
     try:
-        return await query_service.execute_query(name, request.sql)
+        sql = await query_service.prepare_sql(name, request.sql)
+
+        cached = query_result_cache.get((name, sql))
+        if cached is None:
+            result = await query_service.execute_prepared(name, sql)
+            body = result.model_dump_json(by_alias=True)
+            cached = query_result_cache[name, sql] = (make_etag(body), body)
+
+        etag, body = cached
+        headers = {"ETag": etag, "Cache-Control": f"private, max-age={RESULT_CACHE_TTL}"}
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        return Response(content=body, media_type="application/json", headers=headers)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -63,25 +108,26 @@ async def execute_query(
 async def export_query(
     name: str = Path(..., description="数据库连接名称"),
     request: ExecuteQueryRequest = None,
+    query_service: QueryService = Depends(get_query_service),
 ) -> Response:
     """Execute SQL query and export result as CSV.
 
     Args:
         name: Database connection name
         request: Query request with SQL
+        query_service: Injected query service
 
     Returns:
-        CSV file download
+        CSV file download, streamed batch by batch
 
     Raises:
         HTTPException: If validation or execution fails
     """
     try:
-        result = await query_service.execute_query(name, request.sql)
-        csv_data = query_service.export_to_csv(result)
+        chunks = await query_service.iter_csv_chunks(name, request.sql)
 
-        return Response(
-            content=csv_data,
+        return StreamingResponse(
+            chunks,
             media_type="text/csv",
             headers={"Content-Disposition": f"attachment; filename=query_result_{name}.csv"},
         )
@@ -107,12 +153,14 @@ async def export_query(
 async def generate_sql(
     name: str = Path(..., description="数据库连接名称"),
     request: NaturalLanguageQueryRequest = None,
+    llm_service: LLMService = Depends(get_llm_service),
 ) -> GeneratedSQLResponse:
     """Generate SQL from natural language.
 
     Args:
         name: Database connection name
         request: Natural language request
+        llm_service: Injected LLM service
 
     Returns:
         GeneratedSQLResponse with SQL and explanation
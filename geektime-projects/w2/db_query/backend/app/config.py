@@ -1,5 +1,6 @@
 """Configuration management for the application."""
 
+from functools import lru_cache
 from pathlib import Path
 
 from pydantic_settings import BaseSettings
@@ -14,6 +15,8 @@ class Settings(BaseSettings):
         llm_base_url: Base URL for LLM API (for custom providers)
         llm_model: Model name to use (default: gpt-4o-mini for OpenAI)
         database_path: Path to SQLite database for metadata storage
+        max_query_rows: Maximum number of rows returned by a single query
+        db_probe_timeout: Seconds to wait when probing a remote database connection
     """
 
     # LLM Configuration
@@ -28,6 +31,12 @@ class Settings(BaseSettings):
     # Database Configuration
     database_path: Path = Path.home() / ".db_query" / "db_query.db"
 
+    # Query Configuration
+    max_query_rows: int = 10_000
+
+    # Connection probe timeout in seconds
+    db_probe_timeout: float = 3.0
+
     model_config = {
         "env_file": ".env",
         "env_file_encoding": "utf-8",
@@ -43,6 +52,13 @@ class Settings(BaseSettings):
         self.database_path.parent.mkdir(parents=True, exist_ok=True)
 
 
-# Global settings instance
-settings = Settings()
-settings.ensure_database_dir()
+@lru_cache
+def get_settings() -> Settings:
+    """Load settings once, on first use rather than at import time.
+
+    Returns:
+        Shared Settings instance
+    """
+    settings = Settings()
+    settings.ensure_database_dir()
+    return settings
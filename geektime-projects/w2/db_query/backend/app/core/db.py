@@ -1,93 +1,264 @@
 """SQLite database management for storing metadata and connections."""
 
+import asyncio
+import sqlite3
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 import aiosqlite
 
-from app.config import settings
+from app.config import get_settings
+
+# Applied to every pooled connection; shared cache is deliberately left off
+CONNECTION_PRAGMAS = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA busy_timeout=5000;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA cache_size=-20000;
+    PRAGMA mmap_size=134217728;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA foreign_keys=ON;
+"""
+
+# Connection lookup behind DatabaseManager.get_database_info. One literal keeps
+# the text identical, so sqlite3's per-connection statement cache reuses the
+# prepared statement on pooled connections.
+DATABASE_LOOKUP_SQL = "SELECT url, db_type FROM databases WHERE name = ?"
+
+# Secondary metadata indexes by name; large cache refreshes drop them and
+# build them again afterwards instead of updating them row by row
+METADATA_INDEXES = {
+    "idx_metadata_table_name": "CREATE INDEX IF NOT EXISTS idx_metadata_table_name ON metadata(table_name)",
+    "idx_metadata_schema_table": (
+        "CREATE INDEX IF NOT EXISTS idx_metadata_schema_table ON metadata(schema_name, table_name)"
+    ),
+}
+_METADATA_INDEX_DDL = "\n".join(f"    {sql};" for sql in METADATA_INDEXES.values())
+
+# Metadata store schema, applied in a single executescript call
+SCHEMA = f"""
+    BEGIN IMMEDIATE;
+
+    CREATE TABLE IF NOT EXISTS databases (
+        name TEXT PRIMARY KEY,
+        url TEXT NOT NULL,
+        db_type TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        last_connected_at TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS metadata (
+        db_name TEXT NOT NULL,
+        schema_name TEXT NOT NULL,
+        table_name TEXT NOT NULL,
+        table_type TEXT NOT NULL,
+        column_name TEXT NOT NULL,
+        data_type TEXT NOT NULL,
+        is_nullable INTEGER NOT NULL,
+        is_primary_key INTEGER NOT NULL,
+        metadata_extracted_at TEXT NOT NULL,
+        PRIMARY KEY (db_name, schema_name, table_name, column_name),
+        FOREIGN KEY (db_name) REFERENCES databases(name) ON DELETE CASCADE
+    );
+
+    -- The primary key index already serves "WHERE db_name = ? ORDER BY
+    -- schema_name, table_name, column_name" without a sort, so a separate
+    -- db_name index only slowed down cache writes
+    DROP INDEX IF EXISTS idx_metadata_db_name;
+{_METADATA_INDEX_DDL}
+
+    COMMIT;
+"""
 
 
 class DatabaseManager:
     """Manage SQLite database operations.
 
+    Holds one long-lived writer connection and a small pool of reader
+    connections, all opened on first use and reused for the process lifetime.
+
     Attributes:
         db_path: Path to the SQLite database file
+        reader_count: Number of pooled reader connections
+        write_lock: Lock serializing access to the writer connection
     """
 
-    def __init__(self, db_path: Path | None = None) -> None:
+    def __init__(self, db_path: Path | None = None, reader_count: int = 4) -> None:
         """Initialize the database manager.
 
         Args:
             db_path: Path to the database file. Defaults to settings.database_path.
+            reader_count: Number of pooled reader connections
         """
-        self.db_path = db_path or settings.database_path
+        self._db_path = db_path
+        self.reader_count = reader_count
+        self.write_lock = asyncio.Lock()
+        self._rw: aiosqlite.Connection | None = None
+        self._readers: asyncio.Queue[aiosqlite.Connection] | None = None
+        self._reader_conns: list[aiosqlite.Connection] = []
+        self._open_lock = asyncio.Lock()
+        # Stored connection info by name; rows are only ever added or deleted
+        self._database_info: dict[str, tuple[str, str]] = {}
 
-    async def initialize_database(self) -> None:
-        """Create database tables if they don't exist."""
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+    @property
+    def db_path(self) -> Path:
+        """Path to the SQLite database file, resolved from settings on first use."""
+        if self._db_path is None:
+            self._db_path = get_settings().database_path
+        return self._db_path
 
-        async with aiosqlite.connect(self.db_path) as db:
-            # Create databases table
-            await db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS databases (
-                    name TEXT PRIMARY KEY,
-                    url TEXT NOT NULL,
-                    db_type TEXT NOT NULL,
-                    created_at TEXT NOT NULL,
-                    last_connected_at TEXT
-                )
-            """
-            )
-
-            # Create metadata table
-            await db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS metadata (
-                    db_name TEXT NOT NULL,
-                    schema_name TEXT NOT NULL,
-                    table_name TEXT NOT NULL,
-                    table_type TEXT NOT NULL,
-                    column_name TEXT NOT NULL,
-                    data_type TEXT NOT NULL,
-                    is_nullable INTEGER NOT NULL,
-                    is_primary_key INTEGER NOT NULL,
-                    metadata_extracted_at TEXT NOT NULL,
-                    PRIMARY KEY (db_name, schema_name, table_name, column_name),
-                    FOREIGN KEY (db_name) REFERENCES databases(name) ON DELETE CASCADE
-                )
-            """
-            )
-
-            # Create indexes
-            await db.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_metadata_db_name
-                ON metadata(db_name)
-            """
-            )
-            await db.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_metadata_table_name
-                ON metadata(table_name)
-            """
-            )
-            await db.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_metadata_schema_table
-                ON metadata(schema_name, table_name)
-            """
-            )
-
-            await db.commit()
-
-    async def get_connection(self) -> aiosqlite.Connection:
-        """Get a database connection.
+    @db_path.setter
+    def db_path(self, path: Path | None) -> None:
+        """Point the manager at another database file; None falls back to settings.
+
+        Raises:
+            RuntimeError: If connections are already open on the current file
+        """
+        if self._rw is not None:
+            raise RuntimeError("数据库连接已打开，无法更改数据库路径")
+        self._db_path = path
+        self._database_info.clear()
+
+    async def open(self) -> None:
+        """Open the writer and reader connections if not already open."""
+        if self._rw is not None:
+            return
+
+        async with self._open_lock:
+            if self._rw is not None:
+                return
+
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            # Writer first so WAL mode is in place before readers attach
+            writer = await self._connect()
+
+            readers: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+            for _ in range(self.reader_count):
+                conn = await self._connect(query_only=True)
+                self._reader_conns.append(conn)
+                readers.put_nowait(conn)
+
+            self._readers = readers
+            self._rw = writer
+
+    async def _connect(self, query_only: bool = False) -> aiosqlite.Connection:
+        """Open a tuned connection in autocommit mode.
+
+        Args:
+            query_only: Whether to reject writes on this connection
 
         Returns:
             aiosqlite connection object
         """
-        return await aiosqlite.connect(self.db_path)
+        conn = await aiosqlite.connect(self.db_path, isolation_level=None)
+        await conn.executescript(CONNECTION_PRAGMAS)
+        if query_only:
+            await conn.execute("PRAGMA query_only=1")
+        return conn
+
+    async def close(self) -> None:
+        """Close all pooled connections."""
+        async with self._open_lock:
+            for conn in self._reader_conns:
+                await conn.close()
+            self._reader_conns.clear()
+            self._readers = None
+
+            if self._rw is not None:
+                await self._rw.close()
+                self._rw = None
+
+    @asynccontextmanager
+    async def acquire_reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a reader connection from the pool.
+
+        Yields:
+            aiosqlite connection for read-only statements
+        """
+        await self.open()
+        assert self._readers is not None
+        conn = await self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put_nowait(conn)
+
+    @asynccontextmanager
+    async def acquire_writer(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Run a write transaction on the writer connection.
+
+        The block runs inside ``BEGIN IMMEDIATE`` so the write lock is taken up
+        front instead of upgrading later (which can fail with SQLITE_BUSY). The
+        transaction is committed on exit and rolled back if the block raises.
+
+        Yields:
+            aiosqlite connection for write statements
+        """
+        await self.open()
+        assert self._rw is not None
+        async with self.write_lock:
+            await self._rw.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._rw
+            except BaseException:
+                await self._rw.rollback()
+                raise
+            await self._rw.commit()
+
+    async def get_database_info(self, name: str) -> tuple[str, str] | None:
+        """Look up a stored database connection, caching the result.
+
+        Args:
+            name: Database connection name
+
+        Returns:
+            Tuple of (url, db_type), or None if no such connection is stored
+        """
+        info = self._database_info.get(name)
+        if info is not None:
+            return info
+
+        async with self.acquire_reader() as conn, conn.execute(DATABASE_LOOKUP_SQL, (name,)) as cursor:
+            row = await cursor.fetchone()
+
+        if row is None:
+            return None
+        info = self._database_info[name] = (row[0], row[1])
+        return info
+
+    def invalidate_database_info(self, name: str) -> None:
+        """Forget cached connection info after the stored row changes.
+
+        Args:
+            name: Database connection name
+        """
+        self._database_info.pop(name, None)
+
+    async def initialize_database(self) -> None:
+        """Create database tables if they don't exist."""
+        await self.open()
+        assert self._rw is not None
+        # executescript commits any open transaction first, so the script
+        # brings its own instead of running inside acquire_writer()
+        async with self.write_lock:
+            await self._rw.executescript(SCHEMA)
+
+    def initialize_database_sync(self) -> None:
+        """Create database tables with a one-off blocking connection.
+
+        For command-line setup, where starting an event loop and aiosqlite's
+        worker thread would cost more than the DDL itself. Not for use while
+        the pooled connections are open in the same process.
+        """
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            # Sets WAL mode on the file before the schema is created
+            conn.executescript(CONNECTION_PRAGMAS)
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
 
 
 # Global database manager instance
@@ -1,9 +1,38 @@
 """SQL parsing and validation using sqlglot."""
 
+import asyncio
+import re
+import threading
+from functools import lru_cache
+
 import sqlglot
-from pydantic import BaseModel
+from cachetools import TTLCache, cached
+from cachetools.keys import hashkey
+from pydantic import BaseModel, ConfigDict
 from sqlglot import exp
 
+# Whitespace and comments allowed before the first keyword. The possessive
+# quantifiers keep each comment matched one way only; otherwise a failed
+# keyword match re-splits "-- -- --" in exponentially many ways.
+_LEADING_COMMENTS = r"^(?:\s++|/\*.*?\*/|--[^\n]*+)*+"
+# Statements that can never be a SELECT, recognized after any leading comments.
+# Anything else goes to sqlglot so malformed input still reports a syntax error.
+_NON_SELECT_RE = re.compile(
+    _LEADING_COMMENTS + r"(?:INSERT|UPDATE|DELETE|DROP|CREATE|ALTER|TRUNCATE|REPLACE|MERGE|GRANT|REVOKE)\b",
+    re.IGNORECASE | re.DOTALL,
+)
+# Only statements opening with SELECT or WITH parse to exp.Select
+SELECT_START_RE = re.compile(_LEADING_COMMENTS + r"(?:SELECT|WITH)\b", re.IGNORECASE | re.DOTALL)
+
+# Validation results, bounded in size and age. Keyed on the exact SQL: the
+# rewritten SQL must keep the caller's literals, so a structural key that
+# ignores them could not reuse the result without parsing again anyway.
+_validation_cache: TTLCache[tuple[str, str], "ValidationResult"] = TTLCache(maxsize=2048, ttl=600)
+_validation_lock = threading.Lock()
+
+# Template for the injected LIMIT; copied per use since builders re-parent the node
+_DEFAULT_LIMIT = exp.Limit(expression=exp.Literal.number(1000))
+
 
 class ValidationResult(BaseModel):
     """Result of SQL validation.
@@ -14,14 +43,40 @@ class ValidationResult(BaseModel):
         error: Error message if invalid
     """
 
+    # Instances are shared through the validation cache
+    model_config = ConfigDict(frozen=True)
+
     is_valid: bool
     sql: str
     error: str | None = None
 
 
-def validate_and_transform_sql(sql: str, dialect: str = "postgres") -> ValidationResult:
+@lru_cache(maxsize=1024)
+def parse_sql(sql: str, dialect: str = "postgres") -> exp.Expression:
+    """Parse SQL into a sqlglot expression, caching the AST.
+
+    The returned expression is shared between callers and must not be
+    mutated; use builder methods that copy (the default) instead.
+
+    Args:
+        sql: The SQL to parse
+        dialect: SQL dialect
+
+    Returns:
+        Parsed sqlglot expression
+
+    Raises:
+        sqlglot.ParseError: If the SQL cannot be parsed
+    """
+    return sqlglot.parse_one(sql, dialect=dialect)
+
+
+async def validate_and_transform_sql(sql: str, dialect: str = "postgres") -> ValidationResult:
     """Validate SQL and ensure it's a SELECT query with LIMIT.
 
+    Parsing is CPU-bound, so cache misses run in a worker thread to keep the
+    event loop responsive.
+
     Args:
         sql: The SQL query to validate
         dialect: SQL dialect (postgres, mysql, etc.)
@@ -29,9 +84,27 @@ def validate_and_transform_sql(sql: str, dialect: str = "postgres") -> Validatio
     Returns:
         ValidationResult with validation status and (potentially modified) SQL
     """
+    sql = sql.strip()
+
+    # Writes and DDL are rejected from their first keyword; no parse needed
+    if _NON_SELECT_RE.match(sql):
+        return ValidationResult(is_valid=False, sql=sql, error="仅允许 SELECT 查询")
+
+    # Cache hits are cheap enough to skip the thread hop
+    with _validation_lock:
+        result = _validation_cache.get(hashkey(sql, dialect))
+    if result is not None:
+        return result
+
+    return await asyncio.to_thread(_validate_impl, sql, dialect)
+
+
+@cached(_validation_cache, lock=_validation_lock)
+def _validate_impl(sql: str, dialect: str) -> ValidationResult:
+    """Cached implementation of validate_and_transform_sql."""
     try:
-        # Parse the SQL
-        parsed = sqlglot.parse_one(sql, dialect=dialect)
+        # Parse the SQL (shared cached AST)
+        parsed = parse_sql(sql, dialect)
 
         # Check if it's a SELECT statement
         if not isinstance(parsed, exp.Select):
@@ -41,12 +114,13 @@ def validate_and_transform_sql(sql: str, dialect: str = "postgres") -> Validatio
                 error="仅允许 SELECT 查询",
             )
 
-        # Add LIMIT if not present
-        if not parsed.limit:
-            parsed.set_limit(exp.Limit(expression=exp.Number(this=1000)))
+        # SQL that already has a LIMIT runs exactly as written; regenerating it
+        # would rewrite dialect syntax such as casts and intervals
+        if parsed.args.get("limit"):
+            return ValidationResult(is_valid=True, sql=sql, error=None)
 
-        # Transform back to SQL
-        transformed_sql = parsed.sql(dialect=dialect)
+        # limit() returns a copy, leaving the cached AST intact
+        transformed_sql = parsed.limit(_DEFAULT_LIMIT.copy()).sql(dialect=dialect)
 
         return ValidationResult(
             is_valid=True,
@@ -78,8 +152,13 @@ def is_select_query(sql: str, dialect: str = "postgres") -> bool:
     Returns:
         True if it's a SELECT query, False otherwise
     """
+    sql = sql.strip()
+    # Only rejections are decided without sqlglot; "SELECT ... UNION ..." or
+    # trailing statements mean a SELECT prefix alone cannot confirm a match
+    if not SELECT_START_RE.match(sql):
+        return False
+
     try:
-        parsed = sqlglot.parse_one(sql, dialect=dialect)
-        return isinstance(parsed, exp.Select)
+        return isinstance(parse_sql(sql, dialect), exp.Select)
     except Exception:
         return False
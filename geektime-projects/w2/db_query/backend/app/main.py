@@ -1,11 +1,12 @@
 """Database Query Tool - FastAPI Application."""
 
+import json
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 
 
 @asynccontextmanager
@@ -16,12 +17,18 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:  # pragma: no co
         None
     """
     # Startup
+    from app.adapters.registry import AdapterRegistry
+    from app.api.v1.queries import get_llm_service, get_query_service
     from app.core.db import db_manager
 
     await db_manager.initialize_database()
+    # Build shared services up front so the first request doesn't pay for it
+    get_query_service()
+    get_llm_service()
     yield
     # Shutdown
-    # Cleanup
+    await AdapterRegistry.close_all()
+    await db_manager.close()
 
 
 # Create FastAPI application
@@ -64,15 +71,19 @@ async def global_exception_handler(request, exc: Exception) -> JSONResponse:
     )
 
 
+# Constant health body, serialized once instead of on every probe
+_HEALTH_BODY = json.dumps({"status": "healthy"}).encode()
+
+
 # Health check endpoint
 @app.get("/health")
-async def health_check() -> dict[str, str]:
+async def health_check() -> Response:
     """Health check endpoint.
 
     Returns:
-        dict with status
+        JSON response with status
     """
-    return {"status": "healthy"}
+    return Response(content=_HEALTH_BODY, media_type="application/json")
 
 
 # Import and include API routers
@@ -90,4 +101,8 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=True,
+        # Both ship with uvicorn[standard]; naming them fails fast if missing
+        loop="uvloop",
+        http="httptools",
+        log_level="info",
     )
@@ -6,6 +6,8 @@ from typing import Literal
 from pydantic import BaseModel, Field, field_validator
 from pydantic.alias_generators import to_camel
 
+from app.core.security import get_database_type
+
 DatabaseType = Literal["postgresql", "mysql"]
 ConnectionStatus = Literal["connected", "failed", "pending"]
 
@@ -90,6 +92,6 @@ class AddDatabaseRequest(BaseModel):
         Raises:
             ValueError: If URL format is invalid
         """
-        if not v.startswith(("postgresql://", "postgres://", "mysql://")):
+        if get_database_type(v) is None:
             raise ValueError("仅支持 PostgreSQL 和 MySQL 连接字符串")
         return v.strip()
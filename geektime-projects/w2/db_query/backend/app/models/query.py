@@ -26,9 +26,10 @@ class QueryResult(BaseModel):
 
     Attributes:
         columns: List of column names
-        rows: List of rows as dictionaries
+        rows: List of rows, each a list of values in ``columns`` order
         row_count: Total number of rows returned
         execution_time_ms: Query execution time in milliseconds
+        truncated: Whether rows were cut off at the row limit
     """
 
     model_config = {
@@ -37,9 +38,10 @@ class QueryResult(BaseModel):
     }
 
     columns: list[str] = Field(alias="columns", description="Column names")
-    rows: list[dict[str, Any]] = Field(alias="rows", description="Row data")
+    rows: list[list[Any]] = Field(alias="rows", description="Row data in column order")
     row_count: int = Field(alias="rowCount", description="Total row count")
     execution_time_ms: int = Field(alias="executionTimeMs", description="Execution time in milliseconds")
+    truncated: bool = Field(default=False, alias="truncated", description="Whether rows were truncated")
 
 
 class NaturalLanguageQueryRequest(BaseModel):
@@ -1,16 +1,26 @@
 """Database service for managing database connections."""
 
-from datetime import datetime
-
-import aiosqlite
+import asyncio
+from datetime import UTC, datetime
 
 from app.adapters.registry import AdapterRegistry
+from app.config import get_settings
 from app.core.db import db_manager
 from app.core.security import is_valid_database_name, mask_url_password, validate_database_url
 from app.models.database import DatabaseListResponse, DatabaseResponse
+from app.services.query_service import invalidate_query_results
 from app.utils.logging import logger
 
 
+def _parse_timestamp(value: str) -> datetime:
+    """Parse a stored ISO timestamp as an aware UTC datetime.
+
+    Rows written before timestamps carried an offset are naive UTC.
+    """
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=UTC)
+
+
 class DatabaseService:
     """Service for database connection management.
 
@@ -44,52 +54,115 @@ class DatabaseService:
         if not is_valid:
             raise ValueError(error_msg)
 
-        # Test connection
+        # Probe the remote database while the row is written; the row is
+        # removed again if the probe fails
+        created_at = datetime.now(UTC)
+        probe, insert = await asyncio.gather(
+            self._probe(url, db_type),
+            self._insert_database(name, url, db_type, created_at),
+            return_exceptions=True,
+        )
+
+        if isinstance(probe, BaseException):
+            logger.error(f"Database connection test failed for {name}: {probe}")
+            if not isinstance(insert, BaseException):
+                await self._discard_database(name)
+            raise Exception(f"数据库连接失败: {str(probe)}") from probe
+
+        if isinstance(insert, BaseException):
+            # Check for duplicate name
+            if "UNIQUE" in str(insert):
+                raise ValueError(f"数据库名称 '{name}' 已存在") from insert
+            raise Exception(f"保存数据库连接失败: {str(insert)}") from insert
+
+        # The name may have belonged to a deleted connection
+        invalidate_query_results(name)
+
+        last_connected_at = probe
         try:
-            adapter = AdapterRegistry.get_adapter(db_type)
-            connection = await adapter.connect(url)
-            await connection.connection.close()
-            connection_status = "connected"
-            last_connected_at = datetime.utcnow()
+            async with db_manager.acquire_writer() as conn:
+                await conn.execute(
+                    "UPDATE databases SET last_connected_at = ? WHERE name = ?",
+                    (last_connected_at.isoformat(), name),
+                )
         except Exception as e:
-            logger.error(f"Database connection test failed for {name}: {e}")
-            connection_status = "failed"
-            last_connected_at = None
-            raise Exception(f"数据库连接失败: {str(e)}") from e
+            raise Exception(f"保存数据库连接失败: {str(e)}") from e
+
+        return DatabaseResponse(
+            database_name=name,
+            db_type=db_type,
+            created_at=created_at,
+            connection_status="connected",
+            last_connected_at=last_connected_at,
+        )
+
+    async def _probe(self, url: str, db_type: str) -> datetime:
+        """Connect to the remote database to check it is reachable.
 
-        # Store in SQLite database
+        Args:
+            url: Database connection URL
+            db_type: Database type
+
+        Returns:
+            Time the connection succeeded
+
+        Raises:
+            Exception: If the connection fails or times out
+        """
+        adapter = AdapterRegistry.get_adapter(db_type)
+        timeout = get_settings().db_probe_timeout
         try:
-            async with aiosqlite.connect(db_manager.db_path) as conn:
-                created_at = datetime.utcnow()
+            # An unreachable host must not hold the request open indefinitely
+            await asyncio.wait_for(adapter.ping(url), timeout=timeout)
+        except TimeoutError:
+            logger.error(f"Database connection probe timed out after {timeout}s")
+            raise Exception(f"数据库连接超时 ({timeout}s)") from None
+        return datetime.now(UTC)
 
-                await conn.execute(
-                    """
-                    INSERT INTO databases (name, url, db_type, created_at, last_connected_at)
-                    VALUES (?, ?, ?, ?, ?)
-                    """,
-                    (
-                        name,
-                        mask_url_password(url),
-                        db_type,
-                        created_at.isoformat(),
-                        last_connected_at.isoformat() if last_connected_at else None,
-                    ),
-                )
-                await conn.commit()
-
-            return DatabaseResponse(
-                database_name=name,
-                db_type=db_type,
-                created_at=created_at,
-                connection_status=connection_status,
-                last_connected_at=last_connected_at,
+    async def _close_pool(self, db_type: str, url: str) -> None:
+        """Close the adapter pool of a deleted connection so it is not reused.
+
+        Pools are keyed by the stored URL, which has its password masked.
+
+        Args:
+            db_type: Database type
+            url: Database connection URL
+        """
+        try:
+            await AdapterRegistry.get_adapter(db_type).close_pool(mask_url_password(url))
+        except Exception as e:
+            logger.error(f"Failed to close connection pool: {e}")
+
+    async def _insert_database(self, name: str, url: str, db_type: str, created_at: datetime) -> None:
+        """Store a database connection that has not been probed yet.
+
+        Args:
+            name: Database connection name
+            url: Database connection URL
+            db_type: Database type
+            created_at: Creation time
+        """
+        async with db_manager.acquire_writer() as conn:
+            await conn.execute(
+                """
+                INSERT INTO databases (name, url, db_type, created_at, last_connected_at)
+                VALUES (?, ?, ?, ?, NULL)
+                """,
+                (name, mask_url_password(url), db_type, created_at.isoformat()),
             )
 
+    async def _discard_database(self, name: str) -> None:
+        """Remove a stored connection whose probe failed.
+
+        Args:
+            name: Database connection name
+        """
+        try:
+            async with db_manager.acquire_writer() as conn:
+                await conn.execute("DELETE FROM databases WHERE name = ?", (name,))
+            db_manager.invalidate_database_info(name)
         except Exception as e:
-            # Check for duplicate name
-            if "UNIQUE" in str(e):
-                raise ValueError(f"数据库名称 '{name}' 已存在") from e
-            raise Exception(f"保存数据库连接失败: {str(e)}") from e
+            logger.error(f"Failed to discard database {name}: {e}")
 
     async def list_databases(self) -> DatabaseListResponse:
         """List all database connections.
@@ -98,7 +171,7 @@ class DatabaseService:
             DatabaseListResponse with all databases
         """
         try:
-            async with aiosqlite.connect(db_manager.db_path) as conn:
+            async with db_manager.acquire_reader() as conn:
                 cursor = await conn.execute(
                     """
                     SELECT name, db_type, created_at, last_connected_at
@@ -113,9 +186,9 @@ class DatabaseService:
                     DatabaseResponse(
                         database_name=row[0],
                         db_type=row[1],
-                        created_at=datetime.fromisoformat(row[2]),
+                        created_at=_parse_timestamp(row[2]),
                         connection_status="connected",  # For now, assume connected
-                        last_connected_at=datetime.fromisoformat(row[3]) if row[3] else None,
+                        last_connected_at=_parse_timestamp(row[3]) if row[3] else None,
                     )
                     for row in rows
                 ]
@@ -139,10 +212,11 @@ class DatabaseService:
             Exception: If deletion fails
         """
         try:
-            async with aiosqlite.connect(db_manager.db_path) as conn:
-                # Check if exists
+            async with db_manager.acquire_writer() as conn:
+                # Delete (CASCADE will delete related metadata); RETURNING
+                # tells us whether the row existed without a separate SELECT
                 cursor = await conn.execute(
-                    "SELECT name FROM databases WHERE name = ?",
+                    "DELETE FROM databases WHERE name = ? RETURNING url, db_type",
                     (name,),
                 )
                 row = await cursor.fetchone()
@@ -150,12 +224,9 @@ class DatabaseService:
                 if not row:
                     raise ValueError(f"数据库 '{name}' 不存在")
 
-                # Delete (CASCADE will delete related metadata)
-                await conn.execute(
-                    "DELETE FROM databases WHERE name = ?",
-                    (name,),
-                )
-                await conn.commit()
+            db_manager.invalidate_database_info(name)
+            invalidate_query_results(name)
+            await self._close_pool(row[1], row[0])
 
         except ValueError:
             raise
@@ -175,10 +246,5 @@ class DatabaseService:
         Raises:
             Exception: If connection fails
         """
-        try:
-            adapter = AdapterRegistry.get_adapter(db_type)
-            connection = await adapter.connect(url)
-            await connection.connection.close()
-            return True
-        except Exception:
-            raise
+        await self._probe(url, db_type)
+        return True
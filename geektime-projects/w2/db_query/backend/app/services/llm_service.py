@@ -1,15 +1,101 @@
 """LLM service for generating SQL from natural language."""
 
-import aiosqlite
+import re
+from itertools import groupby
+from typing import TYPE_CHECKING
+
 import sqlglot
-from openai import AsyncOpenAI
+from cachetools import TTLCache
+from pydantic import BaseModel, ConfigDict
 
-from app.config import settings
+from app.adapters.registry import AdapterRegistry
+from app.config import get_settings
 from app.core.db import db_manager
-from app.models.metadata import DatabaseMetadataResponse
+from app.core.sql_parser import SELECT_START_RE
 from app.models.query import GeneratedSQLResponse
 from app.utils.logging import logger
 
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+
+# Opening markdown fence and complete leading comments in a streamed completion
+_CODE_FENCE_RE = re.compile(r"^\s*```[a-zA-Z]*\s*")
+_LEADING_NOISE_RE = re.compile(r"(?:\s|/\*.*?\*/|--[^\n]*\n)*", re.DOTALL)
+
+# System prompts; only the schema variant needs per-call substitution
+_SYSTEM_PROMPT = """You are a SQL expert. Generate SELECT queries based on natural language requests.
+
+Rules:
+- Only generate SELECT queries (no INSERT, UPDATE, DELETE, DROP, etc.)
+- Always add LIMIT clause at the end (default 1000)
+- Use proper SQL syntax
+- Return only the SQL query, no explanations"""
+
+_SYSTEM_PROMPT_WITH_SCHEMA = """You are a SQL expert for a {db_type} database. Generate SELECT queries based on natural language requests.
+
+Available tables and columns:
+{schema_text}
+
+Rules:
+- Only generate SELECT queries (no INSERT, UPDATE, DELETE, DROP, etc.)
+- Always add LIMIT clause at the end (default 1000)
+- Use proper {db_type} syntax
+- Use table and column names from the schema
+- Return only the SQL query, no explanations
+
+Database: {database_name}
+Type: {db_type}"""
+
+
+def _select_prefix_verdict(text: str) -> bool | None:
+    """Judge from the start of a streamed completion whether it is a query.
+
+    Args:
+        text: Completion text received so far
+
+    Returns:
+        True or False once the first keyword is visible, None until then
+    """
+    head = _CODE_FENCE_RE.sub("", text, count=1)
+    rest = head[_LEADING_NOISE_RE.match(head).end() :]
+    # Still inside a fence, a comment or the first keyword
+    if len(rest) < 7 or rest.startswith(("`", "-", "/")):
+        return None
+    return SELECT_START_RE.match(rest) is not None
+
+
+def _sqlglot_dialect(db_type: str | None) -> str | None:
+    """Get the sqlglot dialect for a database type, or None for the generic one."""
+    return AdapterRegistry.get_adapter(db_type).SQL_DIALECT if db_type else None
+
+
+class SchemaContext(BaseModel):
+    """Database schema summary passed to the LLM.
+
+    Attributes:
+        db_type: Database type
+        schema_text: One line per table listing its columns and types
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    db_type: str
+    schema_text: str
+
+
+# Schema summaries keyed by database name; schemas rarely change between prompts
+_schema_cache: TTLCache[str, SchemaContext] = TTLCache(maxsize=128, ttl=60)
+
+
+def invalidate_schema_cache(database_name: str) -> None:
+    """Drop the cached schema summary for a database.
+
+    Args:
+        database_name: Name of database connection
+    """
+    _schema_cache.pop(database_name, None)
+
 
 class LLMService:
     """Service for generating SQL from natural language using various LLM providers.
@@ -23,6 +109,7 @@ class LLMService:
 
     def __init__(self):
         """Initialize LLM service with configured provider."""
+        settings = get_settings()
         self.api_key = settings.get_llm_api_key()
         self.model = settings.llm_model
         self.base_url = settings.llm_base_url
@@ -35,141 +122,166 @@ class LLMService:
         if self.base_url:
             client_kwargs["base_url"] = self.base_url
 
-        self.client = AsyncOpenAI(**client_kwargs) if self.api_key else None
+        self.client: AsyncOpenAI | None = None
+        if self.api_key:
+            # Imported lazily: the SDK is heavy and unused without an API key
+            import openai
+
+            self.client = openai.AsyncOpenAI(**client_kwargs)
 
         if self.api_key:
             logger.info(
                 f"LLM service initialized: provider={settings.llm_provider}, model={self.model}, base_url={self.base_url or 'default'}"
             )
 
-    async def _get_database_metadata(self, database_name: str) -> DatabaseMetadataResponse | None:
+    async def _get_database_metadata(self, database_name: str) -> SchemaContext | None:
         """Get database metadata for context.
 
         Args:
             database_name: Name of database connection
 
         Returns:
-            DatabaseMetadataResponse if found, None otherwise
+            SchemaContext if found, None otherwise
         """
-        try:
-            async with aiosqlite.connect(db_manager.db_path) as conn:
-                # Get db_type
-                cursor = await conn.execute(
-                    "SELECT db_type FROM databases WHERE name = ?",
-                    (database_name,),
-                )
-                row = await cursor.fetchone()
-
-                if not row:
-                    return None
+        cached = _schema_cache.get(database_name)
+        if cached is not None:
+            return cached
 
-                db_type = row[0]
-
-                # Get metadata
+        try:
+            # db_type and metadata rows in one query; a database without
+            # metadata yields a single row with NULL metadata columns
+            async with db_manager.acquire_reader() as conn:
                 cursor = await conn.execute(
                     """
-                    SELECT schema_name, table_name, table_type, column_name, data_type
-                    FROM metadata
-                    WHERE db_name = ?
-                    ORDER BY schema_name, table_name, column_name
+                    SELECT d.db_type, m.schema_name, m.table_name, m.table_type, m.column_name, m.data_type
+                    FROM databases d
+                    LEFT JOIN metadata m ON m.db_name = d.name
+                    WHERE d.name = ?
+                    ORDER BY m.schema_name, m.table_name, m.column_name
                     """,
                     (database_name,),
                 )
                 rows = await cursor.fetchall()
 
-                if not rows:
-                    return None
-
-                # Build simplified metadata for LLM context
-                tables_info = []
-                current_table = None
-                table_info = ""
-
-                for schema_name, table_name, table_type, column_name, data_type in rows:
-                    table_key = f"{schema_name}.{table_name}"
-
-                    if current_table != table_key:
-                        if current_table is not None:
-                            tables_info.append(f"  - {table_info}")
-                        current_table = table_key
-                        table_info = f"{table_name} ({table_type})\n    Columns: "
-
-                    table_info += f"{column_name}({data_type}), "
-
-                if current_table:
-                    tables_info.append(f"  - {table_info}")
-                return DatabaseMetadataResponse(
-                    database_name=database_name,
-                    db_type=db_type,
-                    tables=[],  # Not needed for LLM
-                    metadata_extracted_at="",
-                    is_cached=True,
-                )
+            if not rows or rows[0][1] is None:
+                return None
+
+            db_type = rows[0][0]
+
+            # Build simplified metadata for LLM context, one entry per table
+            parts: list[str] = []
+            for (_, schema_name, table_name, table_type), columns in groupby(rows, key=lambda r: r[:4]):
+                column_list = ", ".join(f"{col[4]}({col[5]})" for col in columns)
+                parts.append(f"  - {schema_name}.{table_name} ({table_type})\n    Columns: {column_list}")
+
+            context = SchemaContext(db_type=db_type, schema_text="\n".join(parts))
+            _schema_cache[database_name] = context
+            return context
 
         except Exception as e:
             logger.error(f"Failed to get metadata for {database_name}: {e}")
             return None
 
-    async def _build_system_message(self, database_name: str) -> str:
+    def _build_system_message(self, database_name: str, metadata: SchemaContext | None) -> str:
         """Build system message with database context.
 
         Args:
             database_name: Name of database connection
+            metadata: Schema summary, if available
 
         Returns:
             System message string
         """
-        # Get metadata
-        metadata = await self._get_database_metadata(database_name)
-
         if not metadata:
-            return """You are a SQL expert. Generate SELECT queries based on natural language requests.
-
-Rules:
-- Only generate SELECT queries (no INSERT, UPDATE, DELETE, DROP, etc.)
-- Always add LIMIT clause at the end (default 1000)
-- Use proper SQL syntax
-- Return only the SQL query, no explanations"""
-
-        # Build context with metadata
-        # Note: In production, you'd include actual table/column info
-        return f"""You are a SQL expert for a {metadata.db_type} database. Generate SELECT queries based on natural language requests.
-
-Available tables and columns will be provided based on the database schema.
-
-Rules:
-- Only generate SELECT queries (no INSERT, UPDATE, DELETE, DROP, etc.)
-- Always add LIMIT clause at the end (default 1000)
-- Use proper {metadata.db_type} syntax
-- Use table and column names from the schema
-- Return only the SQL query, no explanations
+            return _SYSTEM_PROMPT
 
-Database: {database_name}
-Type: {metadata.db_type}"""
+        return _SYSTEM_PROMPT_WITH_SCHEMA.format(
+            db_type=metadata.db_type,
+            schema_text=metadata.schema_text,
+            database_name=database_name,
+        )
 
-    async def _validate_generated_sql(self, sql: str) -> tuple[bool, str]:
+    async def _validate_generated_sql(
+        self, sql: str, db_type: str | None = None
+    ) -> tuple[bool, str, sqlglot.exp.Select | None]:
         """Validate generated SQL.
 
         Args:
             sql: Generated SQL
+            db_type: Target database type, used to pick the sqlglot dialect
 
         Returns:
-            Tuple of (is_valid, error_message)
+            Tuple of (is_valid, error_message, parsed SELECT if valid)
         """
+        # Reject obvious non-queries without building an AST
+        if not SELECT_START_RE.match(sql):
+            return False, "生成的 SQL 不是 SELECT 查询", None
+
         try:
-            parsed = sqlglot.parse_one(sql, error_level=sqlglot.ErrorLevel.IMMEDIATE)
+            parsed = sqlglot.parse_one(
+                sql,
+                read=_sqlglot_dialect(db_type),
+                error_level=sqlglot.ErrorLevel.IMMEDIATE,
+            )
 
             if not isinstance(parsed, sqlglot.exp.Select):
-                return False, "生成的 SQL 不是 SELECT 查询"
+                return False, "生成的 SQL 不是 SELECT 查询", None
 
-            return True, ""
+            return True, "", parsed
 
         except sqlglot.errors.ParseError as e:
             logger.error(f"Generated SQL parse error: {e}")
-            return False, f"生成的 SQL 语法错误: {str(e)}"
+            return False, f"生成的 SQL 语法错误: {str(e)}", None
         except Exception as e:
             logger.error(f"SQL validation error: {e}")
-            return False, f"SQL 验证失败: {str(e)}"
+            return False, f"SQL 验证失败: {str(e)}", None
+
+    async def _stream_completion(self, system_message: str, prompt: str) -> str:
+        """Stream the LLM completion, giving up early if it is clearly not a query.
+
+        Args:
+            system_message: System prompt
+            prompt: Natural language prompt
+
+        Returns:
+            Full completion text
+
+        Raises:
+            ValueError: If the response is empty, malformed or not a SELECT
+        """
+        parts: list[str] = []
+        decided = False
+
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": prompt},
+            ],
+            temperature=0,
+            max_tokens=500,
+            stream=True,
+        )
+        # Leaving the block closes the stream, also when we stop early
+        async with stream:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                parts.append(chunk.choices[0].delta.content or "")
+
+                if not decided:
+                    verdict = _select_prefix_verdict("".join(parts))
+                    if verdict is False:
+                        raise ValueError("生成的 SQL 无效: 生成的 SQL 不是 SELECT 查询")
+                    decided = verdict is not None
+
+        if not parts:
+            logger.error("LLM API stream returned no choices")
+            raise ValueError(
+                f"LLM API 返回的响应格式不正确,缺少 choices 字段。请检查 BASE_URL 和 MODEL 配置是否正确。\n当前配置: base_url={self.base_url}, model={self.model}"
+            )
+
+        return "".join(parts)
 
     async def generate_sql(self, database_name: str, prompt: str) -> GeneratedSQLResponse:
         """Generate SQL from natural language.
@@ -191,7 +303,8 @@ Type: {metadata.db_type}"""
             logger.warning(f"LLM API key not configured, returning placeholder SQL for {database_name}")
             placeholder_sql = f"-- LLM API 密钥未配置\n-- 请在环境变量中设置 LLM_API_KEY 或 OPENAI_API_KEY\n-- 或者根据您的需求修改下方的 SQL 查询\n\n-- 根据您的描述: {prompt}\nSELECT * FROM your_table_name LIMIT 1000;"
 
-            return GeneratedSQLResponse(
+            # Fields are built here from plain strings; skip validation
+            return GeneratedSQLResponse.model_construct(
                 sql=placeholder_sql,
                 explanation="LLM API 密钥未配置，请配置后使用 AI 功能。您可以手动修改上方的 SQL 查询。",
                 warnings=["LLM API key not configured"],
@@ -199,34 +312,11 @@ Type: {metadata.db_type}"""
 
         try:
             # Build system message
-            system_message = await self._build_system_message(database_name)
+            metadata = await self._get_database_metadata(database_name)
+            system_message = self._build_system_message(database_name, metadata)
 
             # Call LLM API
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=0,
-                max_tokens=500,
-            )
-
-            # Debug logging
-            logger.debug(f"LLM API response type: {type(response)}")
-            logger.debug(f"LLM API response: {response}")
-
-            # Validate response
-            if not response:
-                raise ValueError("LLM API 返回空响应")
-
-            if not hasattr(response, "choices") or not response.choices:
-                logger.error(f"Invalid response structure. Response: {response}")
-                raise ValueError(
-                    f"LLM API 返回的响应格式不正确,缺少 choices 字段。请检查 BASE_URL 和 MODEL 配置是否正确。\n当前配置: base_url={self.base_url}, model={self.model}"
-                )
-
-            sql = response.choices[0].message.content or ""
+            sql = await self._stream_completion(system_message, prompt)
 
             # Clean up SQL (remove markdown code blocks if present)
             sql = sql.strip()
@@ -237,15 +327,16 @@ Type: {metadata.db_type}"""
             sql = sql.strip()
 
             # Validate SQL
-            is_valid, error_msg = await self._validate_generated_sql(sql)
+            db_type = metadata.db_type if metadata else None
+            is_valid, error_msg, parsed = await self._validate_generated_sql(sql, db_type)
             if not is_valid:
                 raise ValueError(f"生成的 SQL 无效: {error_msg}")
 
-            # Add LIMIT if not present
-            if "LIMIT" not in sql.upper():
-                sql += " LIMIT 1000"
+            # Add LIMIT if the top-level query has none, reusing the parsed AST
+            if parsed.args.get("limit") is None:
+                sql = parsed.limit(1000).sql(dialect=_sqlglot_dialect(db_type))
 
-            return GeneratedSQLResponse(
+            return GeneratedSQLResponse.model_construct(
                 sql=sql,
                 explanation="根据您的请求生成 SQL 查询",
                 warnings=[],
@@ -1,11 +1,10 @@
 """Metadata service for extracting and caching database metadata."""
 
-from datetime import datetime
-
-import aiosqlite
+from functools import lru_cache
+from itertools import chain, groupby
 
 from app.adapters.registry import AdapterRegistry
-from app.core.db import db_manager
+from app.core.db import METADATA_INDEXES, db_manager
 from app.models.metadata import (
     ColumnMetadata,
     DatabaseMetadataResponse,
@@ -15,6 +14,43 @@ from app.models.metadata import (
 )
 from app.utils.logging import logger
 
+# Columns per metadata row, and rows per INSERT so one statement stays within
+# SQLite's historical 999 bound-parameter limit
+_METADATA_COLUMNS = 9
+_INSERT_BATCH_ROWS = 999 // _METADATA_COLUMNS
+
+# Refreshes at least this large rebuild the secondary indexes once at the end
+_INDEX_REBUILD_ROWS = 5000
+
+
+@lru_cache(maxsize=8)
+def _insert_metadata_sql(row_count: int) -> str:
+    """Build a multi-row metadata upsert for ``row_count`` rows.
+
+    Existing columns are updated in place, so the primary key and secondary
+    indexes are left untouched unless an indexed value changed.
+
+    Args:
+        row_count: Number of rows in the VALUES list
+
+    Returns:
+        INSERT statement with one placeholder group per row
+    """
+    placeholders = ", ".join(["(" + ", ".join("?" * _METADATA_COLUMNS) + ")"] * row_count)
+    return f"""
+        INSERT INTO metadata (
+            db_name, schema_name, table_name, table_type,
+            column_name, data_type, is_nullable, is_primary_key,
+            metadata_extracted_at
+        ) VALUES {placeholders}
+        ON CONFLICT (db_name, schema_name, table_name, column_name) DO UPDATE SET
+            table_type = excluded.table_type,
+            data_type = excluded.data_type,
+            is_nullable = excluded.is_nullable,
+            is_primary_key = excluded.is_primary_key,
+            metadata_extracted_at = excluded.metadata_extracted_at
+    """
+
 
 class MetadataService:
     """Service for database metadata operations.
@@ -37,41 +73,60 @@ class MetadataService:
             Exception: If extraction fails
         """
         try:
-            # Get metadata from database
+            # Get metadata from database (connection pool is reused across calls)
             adapter = AdapterRegistry.get_adapter(db_type)
             connection = await adapter.connect(url)
 
             # Pass the Connection wrapper to get_metadata (not connection.connection)
             db_metadata = await adapter.get_metadata(connection)
-            await connection.connection.close()
-
-            # Convert adapter metadata to API metadata
-            api_tables = [
-                APITableMetadata(
-                    table_name=table.table_name,
-                    table_type=table.table_type,
-                    schema_name=table.schema_name,
-                    columns=[
-                        ColumnMetadata(
+
+            # Convert adapter metadata to API models and cache rows in one pass;
+            # adapter values are already validated, so models skip revalidation
+            # The adapter already stamped the extraction time; every row shares it
+            extracted_at = db_metadata.metadata_extracted_at
+            api_tables: list[APITableMetadata] = []
+            rows: list[tuple] = []
+            for table in db_metadata.tables:
+                columns = []
+                for col in table.columns:
+                    columns.append(
+                        ColumnMetadata.model_construct(
                             column_name=col.column_name,
                             data_type=col.data_type,
                             is_nullable=col.is_nullable,
                             is_primary_key=col.is_primary_key,
                         )
-                        for col in table.columns
-                    ],
+                    )
+                    rows.append(
+                        (
+                            name,
+                            table.schema_name,
+                            table.table_name,
+                            table.table_type,
+                            col.column_name,
+                            col.data_type,
+                            1 if col.is_nullable else 0,
+                            1 if col.is_primary_key else 0,
+                            extracted_at,
+                        )
+                    )
+                api_tables.append(
+                    APITableMetadata.model_construct(
+                        table_name=table.table_name,
+                        table_type=table.table_type,
+                        schema_name=table.schema_name,
+                        columns=columns,
+                    )
                 )
-                for table in db_metadata.tables
-            ]
 
             # Cache in SQLite
-            await self._cache_metadata(name, db_metadata)
+            await self._cache_metadata(name, rows, extracted_at)
 
-            return DatabaseMetadataResponse(
+            return DatabaseMetadataResponse.model_construct(
                 database_name=name,
                 db_type=db_type,
                 tables=api_tables,
-                metadata_extracted_at=datetime.utcnow().isoformat(),
+                metadata_extracted_at=extracted_at,
                 is_cached=False,
             )
 
@@ -89,20 +144,15 @@ class MetadataService:
             DatabaseMetadataResponse if cached, None otherwise
         """
         try:
-            async with aiosqlite.connect(db_manager.db_path) as conn:
-                # Get database info
-                cursor = await conn.execute(
-                    "SELECT db_type FROM databases WHERE name = ?",
-                    (name,),
-                )
-                row = await cursor.fetchone()
+            # Get database info
+            info = await db_manager.get_database_info(name)
+            if info is None:
+                return None
 
-                if not row:
-                    return None
+            db_type = info[1]
 
-                db_type = row[0]
-
-                # Get metadata
+            # Get metadata
+            async with db_manager.acquire_reader() as conn:
                 cursor = await conn.execute(
                     """
                     SELECT schema_name, table_name, table_type, column_name,
@@ -115,62 +165,37 @@ class MetadataService:
                 )
                 rows = await cursor.fetchall()
 
-                if not rows:
-                    return None
-
-                # Build metadata from rows
-                tables_map: dict[str, dict[str, list]] = {}
-
-                for (
-                    schema_name,
-                    table_name,
-                    table_type,
-                    column_name,
-                    data_type,
-                    is_nullable,
-                    is_primary_key,
-                    metadata_extracted_at,
-                ) in rows:
-                    key = f"{schema_name}.{table_name}"
-
-                    if key not in tables_map:
-                        tables_map[key] = {
-                            "table_name": table_name,
-                            "table_type": table_type,
-                            "schema_name": schema_name,
-                            "columns": [],
-                            "extracted_at": metadata_extracted_at,
-                        }
-
-                    tables_map[key]["columns"].append(
-                        ColumnMetadata(
-                            column_name=column_name,
-                            data_type=data_type,
-                            is_nullable=bool(is_nullable),
-                            is_primary_key=bool(is_primary_key),
-                        )
-                    )
+            if not rows:
+                return None
 
-                tables = [
-                    APITableMetadata(
-                        table_name=v["table_name"],
-                        table_type=v["table_type"],
-                        schema_name=v["schema_name"],
-                        columns=v["columns"],
-                    )
-                    for v in tables_map.values()
-                ]
-
-                # Get the most recent extraction time
-                extracted_at = rows[0][7] if rows else datetime.utcnow().isoformat()
-
-                return DatabaseMetadataResponse(
-                    database_name=name,
-                    db_type=db_type,
-                    tables=tables,
-                    metadata_extracted_at=extracted_at,
-                    is_cached=True,
+            # Rows arrive sorted per table; values were validated when cached,
+            # so the models are built without revalidation
+            tables = [
+                APITableMetadata.model_construct(
+                    table_name=table_name,
+                    table_type=table_type,
+                    schema_name=schema_name,
+                    columns=[
+                        ColumnMetadata.model_construct(
+                            column_name=row[3],
+                            data_type=row[4],
+                            is_nullable=bool(row[5]),
+                            is_primary_key=bool(row[6]),
+                        )
+                        for row in table_rows
+                    ],
                 )
+                for (schema_name, table_name, table_type), table_rows in groupby(rows, key=lambda r: r[:3])
+            ]
+
+            return DatabaseMetadataResponse.model_construct(
+                database_name=name,
+                db_type=db_type,
+                tables=tables,
+                # All rows of one cache write share the extraction time
+                metadata_extracted_at=rows[0][7],
+                is_cached=True,
+            )
 
         except Exception as e:
             logger.error(f"Failed to get cached metadata for {name}: {e}")
@@ -191,18 +216,11 @@ class MetadataService:
         """
         try:
             # Get database connection info
-            async with aiosqlite.connect(db_manager.db_path) as conn:
-                cursor = await conn.execute(
-                    "SELECT url, db_type FROM databases WHERE name = ?",
-                    (name,),
-                )
-                row = await cursor.fetchone()
+            info = await db_manager.get_database_info(name)
+            if info is None:
+                raise ValueError(f"数据库 '{name}' 不存在")
 
-                if not row:
-                    raise ValueError(f"数据库 '{name}' 不存在")
-
-                url = row[0]
-                db_type = row[1]
+            url, db_type = info
 
             # Re-extract metadata
             return await self.extract_metadata(name, url, db_type)
@@ -213,50 +231,41 @@ class MetadataService:
             logger.error(f"Failed to refresh metadata for {name}: {e}")
             raise Exception(f"刷新元数据失败: {str(e)}") from e
 
-    async def _cache_metadata(self, name: str, metadata) -> None:
-        """Cache metadata in SQLite.
+    async def _cache_metadata(self, name: str, rows: list[tuple], extracted_at: str) -> None:
+        """Replace the cached metadata rows of a database in SQLite.
 
         Args:
             name: Database connection name
-            metadata: Metadata object with tables
+            rows: Metadata rows in metadata table column order
+            extracted_at: Extraction timestamp carried by every row
         """
         try:
-            async with aiosqlite.connect(db_manager.db_path) as conn:
-                # Delete old metadata first
+            rebuild_indexes = len(rows) >= _INDEX_REBUILD_ROWS
+
+            # Upsert and prune in one write transaction
+            async with db_manager.acquire_writer() as conn:
+                if rebuild_indexes:
+                    for index_name in METADATA_INDEXES:
+                        await conn.execute(f"DROP INDEX IF EXISTS {index_name}")
+
+                # Upsert in multi-row batches; unchanged columns stay where they are
+                for start in range(0, len(rows), _INSERT_BATCH_ROWS):
+                    batch = rows[start : start + _INSERT_BATCH_ROWS]
+                    await conn.execute(
+                        _insert_metadata_sql(len(batch)),
+                        tuple(chain.from_iterable(batch)),
+                    )
+
+                # Every current row now carries this extraction time, so any
+                # other row belongs to a column that no longer exists
                 await conn.execute(
-                    "DELETE FROM metadata WHERE db_name = ?",
-                    (name,),
+                    "DELETE FROM metadata WHERE db_name = ? AND metadata_extracted_at <> ?",
+                    (name, extracted_at),
                 )
-                await conn.commit()  # Commit delete before insert
-
-                # Insert new metadata
-                extracted_at = datetime.utcnow().isoformat()
-
-                for table in metadata.tables:
-                    for column in table.columns:
-                        # Use INSERT OR REPLACE to handle any conflicts
-                        await conn.execute(
-                            """
-                            INSERT OR REPLACE INTO metadata (
-                                db_name, schema_name, table_name, table_type,
-                                column_name, data_type, is_nullable, is_primary_key,
-                                metadata_extracted_at
-                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                            """,
-                            (
-                                name,
-                                table.schema_name,
-                                table.table_name,
-                                table.table_type,
-                                column.column_name,
-                                column.data_type,
-                                1 if column.is_nullable else 0,
-                                1 if column.is_primary_key else 0,
-                                extracted_at,
-                            ),
-                        )
 
-                await conn.commit()
+                if rebuild_indexes:
+                    for create_index_sql in METADATA_INDEXES.values():
+                        await conn.execute(create_index_sql)
 
         except Exception as e:
             logger.error(f"Failed to cache metadata for {name}: {e}")
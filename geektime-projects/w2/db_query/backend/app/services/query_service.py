@@ -2,15 +2,38 @@
 
 import csv
 import io
+from collections.abc import AsyncIterator
 
-import aiosqlite
-import sqlglot
+from cachetools import TTLCache
 
+from app.adapters.base import Connection, DatabaseAdapter
 from app.adapters.registry import AdapterRegistry
+from app.config import get_settings
 from app.core.db import db_manager
+from app.core.sql_parser import validate_and_transform_sql
 from app.models.query import QueryResult
 from app.utils.logging import logger
 
+# Seconds a query result may be reused, both by the API and by the client
+RESULT_CACHE_TTL = 30
+
+# (ETag, serialized result) keyed by (database name, validated SQL), so
+# repeated queries skip the database
+query_result_cache: TTLCache[tuple[str, str], tuple[str, str]] = TTLCache(maxsize=256, ttl=RESULT_CACHE_TTL)
+
+
+def invalidate_query_results(database_name: str) -> None:
+    """Drop cached query results for a database.
+
+    A name can be deleted and registered again for another database, which
+    must not see the old connection's rows.
+
+    Args:
+        database_name: Name of database connection
+    """
+    for key in [key for key in query_result_cache if key[0] == database_name]:
+        query_result_cache.pop(key, None)
+
 
 class QueryService:
     """Service for SQL query execution with safety validation.
@@ -22,133 +45,174 @@ class QueryService:
     - 60-second timeout enforcement
     """
 
-    # Default limit for queries without LIMIT clause
-    DEFAULT_LIMIT = 1000
-
     # Query timeout in seconds
     QUERY_TIMEOUT = 60
 
-    async def validate_sql(self, sql: str) -> tuple[bool, str]:
-        """Validate SQL query for safety.
+    # Rows fetched per batch when streaming CSV exports
+    EXPORT_BATCH_SIZE = 1000
 
-        Checks:
-        1. SQL syntax is valid
-        2. Only SELECT statements allowed
+    async def execute_query(self, database_name: str, sql: str) -> QueryResult:
+        """Execute SQL query on database.
 
         Args:
-            sql: SQL query string
+            database_name: Name of database connection
+            sql: SQL query to execute
 
         Returns:
-            Tuple of (is_valid, error_message)
-        """
-        try:
-            # Parse SQL to validate syntax
-            parsed = sqlglot.parse_one(sql)
-
-            # Check if it's a SELECT statement
-            if not isinstance(parsed, sqlglot.exp.Select):
-                return False, "仅允许 SELECT 查询"
-
-            return True, ""
+            QueryResult with execution results
 
-        except sqlglot.errors.ParseError as e:
-            logger.error(f"SQL parse error: {e}")
-            return False, f"SQL 语法错误: {str(e)}"
-        except Exception as e:
-            logger.error(f"SQL validation error: {e}")
-            return False, f"SQL 验证失败: {str(e)}"
+        Raises:
+            ValueError: If validation fails or database not found
+            Exception: If query execution fails
+        """
+        sql = await self.prepare_sql(database_name, sql)
+        return await self.execute_prepared(database_name, sql)
 
-    def _inject_limit(self, sql: str) -> str:
-        """Inject LIMIT clause into SQL if not present.
+    async def execute_prepared(self, database_name: str, sql: str) -> QueryResult:
+        """Execute SQL that has already been through ``prepare_sql``.
 
         Args:
-            sql: SQL query string
+            database_name: Name of database connection
+            sql: Validated SQL query to execute
 
         Returns:
-            SQL with LIMIT clause
+            QueryResult with execution results
+
+        Raises:
+            ValueError: If database not found
+            Exception: If query execution fails
         """
         try:
-            parsed = sqlglot.parse_one(sql)
+            adapter, connection = await self._get_connection(database_name)
 
-            # Check if LIMIT already exists
-            has_limit = any(isinstance(expr, sqlglot.exp.Limit) for expr in parsed.find_all(sqlglot.exp.Limit))
-
-            if not has_limit:
-                # Inject LIMIT
-                parsed = parsed.limit(str(self.DEFAULT_LIMIT))
-                return parsed.sql()
-            else:
-                return sql
+            # Execute query with timeout
+            result = await adapter.execute_query(
+                connection,
+                sql,
+                timeout=self.QUERY_TIMEOUT,
+                max_rows=get_settings().max_query_rows,
+            )
+
+            # Adapter rows are trusted; wrap them in the API model without revalidation
+            return QueryResult.model_construct(
+                columns=result.columns,
+                rows=result.rows,
+                row_count=result.row_count,
+                execution_time_ms=result.execution_time_ms,
+                truncated=result.truncated,
+            )
 
+        except ValueError:
+            raise
         except Exception as e:
-            logger.warning(f"Failed to inject LIMIT, using original SQL: {e}")
-            return sql
+            logger.error(f"Query execution failed for {database_name}: {e}")
+            raise Exception(f"查询执行失败: {str(e)}") from e
 
-    async def execute_query(self, database_name: str, sql: str) -> QueryResult:
-        """Execute SQL query on database.
+    async def iter_csv_chunks(self, database_name: str, sql: str) -> AsyncIterator[bytes]:
+        """Stream query results as CSV, one encoded chunk per fetched batch.
+
+        Validation and the database lookup run before this returns, so those
+        errors surface before any response is sent.
 
         Args:
             database_name: Name of database connection
             sql: SQL query to execute
 
         Returns:
-            QueryResult with execution results
+            Async iterator of UTF-8 encoded CSV chunks
 
         Raises:
             ValueError: If validation fails or database not found
-            Exception: If query execution fails
+            Exception: If the database connection fails
         """
-        # Validate SQL
-        is_valid, error_msg = await self.validate_sql(sql)
-        if not is_valid:
-            raise ValueError(error_msg)
-
-        # Inject LIMIT if needed
-        sql = self._inject_limit(sql)
+        sql = await self.prepare_sql(database_name, sql)
 
         try:
-            # Get database connection info
-            async with aiosqlite.connect(db_manager.db_path) as conn:
-                cursor = await conn.execute(
-                    "SELECT url, db_type FROM databases WHERE name = ?",
-                    (database_name,),
-                )
-                row = await cursor.fetchone()
+            adapter, connection = await self._get_connection(database_name)
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.error(f"Query execution failed for {database_name}: {e}")
+            raise Exception(f"查询执行失败: {str(e)}") from e
 
-                if not row:
-                    raise ValueError(f"数据库 '{database_name}' 不存在")
+        return self._csv_chunks(adapter, connection, sql)
 
-                url = row[0]
-                db_type = row[1]
+    async def _csv_chunks(self, adapter: DatabaseAdapter, connection: Connection, sql: str) -> AsyncIterator[bytes]:
+        """Encode streamed query batches as CSV."""
+        output = io.StringIO()
+        writer = csv.writer(output)
+        header_written = False
+
+        async for columns, rows in adapter.stream_query(
+            connection,
+            sql,
+            timeout=self.QUERY_TIMEOUT,
+            batch_size=self.EXPORT_BATCH_SIZE,
+        ):
+            if not header_written:
+                writer.writerow(columns)
+                header_written = True
+            writer.writerows(rows)
+
+            chunk = output.getvalue()
+            if chunk:
+                yield chunk.encode()
+
+            # Reuse the buffer for the next batch
+            output.seek(0)
+            output.truncate(0)
+
+    async def prepare_sql(self, database_name: str, sql: str) -> str:
+        """Validate SQL in the target database's dialect and inject LIMIT if needed.
 
-            # Get adapter and connect
-            adapter = AdapterRegistry.get_adapter(db_type)
-            connection = await adapter.connect(url)
+        Args:
+            database_name: Name of database connection
+            sql: SQL query to prepare
 
-            # Execute query with timeout
-            result = await adapter.execute_query(connection, sql, timeout=self.QUERY_TIMEOUT)
+        Returns:
+            SQL ready for execution
 
-            await connection.connection.close()
+        Raises:
+            ValueError: If validation fails or database not found
+        """
+        adapter, _ = await self._lookup(database_name)
+        result = await validate_and_transform_sql(sql, dialect=adapter.SQL_DIALECT)
+        if not result.is_valid:
+            raise ValueError(result.error)
 
-            return result
+        return result.sql
 
-        except ValueError:
-            raise
-        except Exception as e:
-            logger.error(f"Query execution failed for {database_name}: {e}")
-            raise Exception(f"查询执行失败: {str(e)}") from e
+    async def _lookup(self, database_name: str) -> tuple[DatabaseAdapter, str]:
+        """Look up a stored database and the adapter for its type.
 
-    def export_to_csv(self, result: QueryResult) -> str:
-        """Export query result to CSV format.
+        Args:
+            database_name: Name of database connection
+
+        Returns:
+            Tuple of (adapter, url)
+
+        Raises:
+            ValueError: If database not found
+        """
+        info = await db_manager.get_database_info(database_name)
+        if info is None:
+            raise ValueError(f"数据库 '{database_name}' 不存在")
+
+        url, db_type = info
+        return AdapterRegistry.get_adapter(db_type), url
+
+    async def _get_connection(self, database_name: str) -> tuple[DatabaseAdapter, Connection]:
+        """Look up a stored database and get a pooled connection to it.
 
         Args:
-            result: QueryResult to export
+            database_name: Name of database connection
 
         Returns:
-            CSV string
+            Tuple of (adapter, connection)
+
+        Raises:
+            ValueError: If database not found
         """
-        output = io.StringIO()
-        writer = csv.DictWriter(output, fieldnames=result.columns)
-        writer.writeheader()
-        writer.writerows(result.rows)
-        return output.getvalue()
+        adapter, url = await self._lookup(database_name)
+        connection = await adapter.connect(url)
+        return adapter, connection
@@ -0,0 +1,37 @@
+"""Helpers for conditional HTTP requests (ETag / If-None-Match)."""
+
+import hashlib
+
+
+def make_etag(*parts: str) -> str:
+    """Build a strong ETag from the parts that identify a response.
+
+    Args:
+        parts: Values the response content depends on
+
+    Returns:
+        Quoted ETag header value
+    """
+    digest = hashlib.blake2b("|".join(parts).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Check whether an If-None-Match header matches an ETag.
+
+    Args:
+        if_none_match: Raw If-None-Match header value, if any
+        etag: Quoted ETag of the current representation
+
+    Returns:
+        True if the client already holds this representation
+    """
+    if not if_none_match:
+        return False
+
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        # Weak comparison, as RFC 9110 requires for If-None-Match
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
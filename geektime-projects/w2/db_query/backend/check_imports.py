@@ -1,24 +1,35 @@
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# Patterns only need ASCII tokens, so files are scanned as bytes without decoding
+GENERIC_RE = re.compile(rb'\b(List|Dict)\[')
+TYPING_IMPORT_RE = re.compile(rb'from typing import ([^\n]+)')
+
+
+def scan_file(py_file: Path) -> tuple[Path, list[str]] | None:
+    """Return the typing names a file uses without importing, if any."""
+    content = py_file.read_bytes()
+
+    # Check what types are used, in one pass
+    used = {match.group(1).decode() for match in GENERIC_RE.finditer(content)}
+    if not used:
+        return None
+
+    # Check current typing import
+    typing_match = TYPING_IMPORT_RE.search(content)
+    current_imports = typing_match.group(1).decode() if typing_match else ""
+
+    needed = [name for name in ('List', 'Dict') if name in used and name not in current_imports]
+    return (py_file, needed) if needed else None
+
+
 app_dir = Path("app")
-for py_file in app_dir.rglob("*.py"):
-    content = py_file.read_text()
-    
-    # Check what types are used
-    uses_list = bool(re.search(r'\bList\[', content))
-    uses_dict = bool(re.search(r'\bDict\[', content))
-    
-    if uses_list or uses_dict:
-        # Check current typing import
-        typing_match = re.search(r'from typing import ([^\n]+)', content)
-        current_imports = typing_match.group(1) if typing_match else ""
-        
-        needed = []
-        if uses_list and 'List' not in current_imports:
-            needed.append('List')
-        if uses_dict and 'Dict' not in current_imports:
-            needed.append('Dict')
-        
-        if needed:
-            print(f"{py_file}: needs {needed}")
+# File reads release the GIL, so scanning overlaps across threads; map keeps the order
+with ThreadPoolExecutor(max_workers=8) as pool:
+    results = list(pool.map(scan_file, app_dir.rglob("*.py")))
+
+for result in results:
+    if result is not None:
+        py_file, needed = result
+        print(f"{py_file}: needs {needed}")
@@ -1,65 +1,42 @@
 """Database utility scripts for managing the SQLite database."""
 
 import asyncio
+import os
 import sys
+import time
 from pathlib import Path
-from datetime import datetime
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import aiosqlite
-from app.config import settings
+from app.config import get_settings
+from app.core.db import db_manager
+
+# Commands share the application's connection manager, so connections are
+# opened and tuned once per run and closed by main()
+settings = get_settings()
+
+_BYTES_PER_MB = 1024 * 1024
+
+
+def _on_disk_size(db_path: Path) -> int:
+    """Size of a database file plus its WAL and shared-memory sidecar files."""
+    size = 0
+    for suffix in ("", "-wal", "-shm"):
+        try:
+            size += os.stat(f"{db_path}{suffix}").st_size
+        except FileNotFoundError:
+            pass
+    return size
 
 
 async def init_database() -> None:
     """Initialize the database with tables."""
     settings.ensure_database_dir()
     
-    async with aiosqlite.connect(settings.database_path) as db:
-        # Create databases table
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS databases (
-                name TEXT PRIMARY KEY,
-                url TEXT NOT NULL,
-                db_type TEXT NOT NULL,
-                created_at TEXT NOT NULL,
-                last_connected_at TEXT
-            )
-        """)
-
-        # Create metadata table
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS metadata (
-                db_name TEXT NOT NULL,
-                schema_name TEXT NOT NULL,
-                table_name TEXT NOT NULL,
-                table_type TEXT NOT NULL,
-                column_name TEXT NOT NULL,
-                data_type TEXT NOT NULL,
-                is_nullable INTEGER NOT NULL,
-                is_primary_key INTEGER NOT NULL,
-                metadata_extracted_at TEXT NOT NULL,
-                PRIMARY KEY (db_name, schema_name, table_name, column_name),
-                FOREIGN KEY (db_name) REFERENCES databases(name) ON DELETE CASCADE
-            )
-        """)
-
-        # Create indexes
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_metadata_db_name
-            ON metadata(db_name)
-        """)
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_metadata_table_name
-            ON metadata(table_name)
-        """)
-        await db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_metadata_schema_table
-            ON metadata(schema_name, table_name)
-        """)
-
-        await db.commit()
+    # The shared schema script creates all tables and indexes in one transaction
+    await db_manager.initialize_database()
     print(f"✓ 数据库已初始化: {settings.database_path}")
 
 
@@ -67,11 +44,10 @@ async def reset_database() -> None:
     """Reset the database by dropping all tables and recreating them."""
     settings.ensure_database_dir()
     
-    async with aiosqlite.connect(settings.database_path) as db:
+    async with db_manager.acquire_writer() as db:
         # Drop tables
         await db.execute("DROP TABLE IF EXISTS metadata")
         await db.execute("DROP TABLE IF EXISTS databases")
-        await db.commit()
     
     # Reinitialize
     await init_database()
@@ -80,10 +56,9 @@ async def reset_database() -> None:
 
 async def clean_database() -> None:
     """Clean all data from the database but keep table structure."""
-    async with aiosqlite.connect(settings.database_path) as db:
+    async with db_manager.acquire_writer() as db:
         await db.execute("DELETE FROM metadata")
         await db.execute("DELETE FROM databases")
-        await db.commit()
     print("✓ 数据库数据已清理")
 
 
@@ -95,21 +70,20 @@ async def show_database_info() -> None:
         print(f"✗ 数据库文件不存在: {db_path}")
         return
     
-    # File size
-    size = db_path.stat().st_size
-    size_mb = size / (1024 * 1024)
+    # File size, counting WAL sidecars so the real footprint is shown
+    size = _on_disk_size(db_path)
+    size_mb = size / _BYTES_PER_MB
     
     print(f"数据库位置: {db_path}")
     print(f"文件大小: {size_mb:.2f} MB ({size:,} bytes)")
     
-    async with aiosqlite.connect(db_path) as db:
-        # Count databases
-        cursor = await db.execute("SELECT COUNT(*) FROM databases")
-        db_count = (await cursor.fetchone())[0]
-        
-        # Count metadata entries
-        cursor = await db.execute("SELECT COUNT(*) FROM metadata")
-        metadata_count = (await cursor.fetchone())[0]
+    async with db_manager.acquire_reader() as db:
+        # Count databases and metadata entries in one statement; SQLite counts
+        # over the narrowest index rather than the table rows
+        cursor = await db.execute(
+            "SELECT (SELECT COUNT(*) FROM databases), (SELECT COUNT(*) FROM metadata)"
+        )
+        db_count, metadata_count = await cursor.fetchone()
         
         # List databases
         cursor = await db.execute("""
@@ -117,18 +91,19 @@ async def show_database_info() -> None:
             FROM databases 
             ORDER BY created_at
         """)
-        databases = await cursor.fetchall()
         
         print(f"\n已存储的数据库连接: {db_count}")
         print(f"元数据条目: {metadata_count}")
         
-        if databases:
+        # Rows are printed as they stream from the cursor instead of being
+        # collected into a list first
+        if db_count:
             print("\n数据库列表:")
-            for name, db_type, created_at, last_connected_at in databases:
-                print(f"  - {name} ({db_type})")
-                print(f"    创建时间: {created_at}")
-                if last_connected_at:
-                    print(f"    最后连接: {last_connected_at}")
+        async for name, db_type, created_at, last_connected_at in cursor:
+            print(f"  - {name} ({db_type})")
+            print(f"    创建时间: {created_at}")
+            if last_connected_at:
+                print(f"    最后连接: {last_connected_at}")
 
 
 async def backup_database(backup_path: str = None) -> None:
@@ -140,17 +115,18 @@ async def backup_database(backup_path: str = None) -> None:
         return
     
     if backup_path is None:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_path = db_path.parent / f"db_query_backup_{timestamp}.db"
+        # Local time formatted straight from the C library
+        backup_path = db_path.with_name(time.strftime("db_query_backup_%Y%m%d_%H%M%S.db"))
     else:
         backup_path = Path(backup_path)
     
-    # Copy database file
-    import shutil
-    shutil.copy2(db_path, backup_path)
+    # SQLite's online backup API gives a consistent copy even while the app
+    # is writing (a plain file copy can miss pages still in the WAL file);
+    # copying 1000 pages per step lets other writers in between steps
+    async with db_manager.acquire_reader() as src, aiosqlite.connect(backup_path) as dst:
+        await src.backup(dst, pages=1000)
     
-    size = backup_path.stat().st_size
-    size_mb = size / (1024 * 1024)
+    size_mb = os.stat(backup_path).st_size / _BYTES_PER_MB
     
     print(f"✓ 数据库已备份到: {backup_path}")
     print(f"  备份文件大小: {size_mb:.2f} MB")
@@ -196,6 +172,8 @@ async def main() -> None:
     except Exception as e:
         print(f"✗ 错误: {e}")
         sys.exit(1)
+    finally:
+        await db_manager.close()
 
 
 if __name__ == "__main__":
@@ -5,22 +5,16 @@ This script creates the database file and tables if they don't exist.
 Run this after installing dependencies or when setting up a new environment.
 """
 
-import asyncio
-from pathlib import Path
-
 from app.core.db import db_manager
 
 
-async def main() -> None:
+def main() -> None:
     """Initialize database."""
     print("Initializing database...")
     print(f"Database path: {db_manager.db_path.expanduser()}")
 
-    # Ensure parent directory exists
-    db_manager.db_path.parent.mkdir(parents=True, exist_ok=True)
-
-    # Initialize database schema
-    await db_manager.initialize_database()
+    # Initialize database schema; a one-shot CLI needs no event loop
+    db_manager.initialize_database_sync()
 
     # Verify database was created
     if db_manager.db_path.expanduser().exists():
@@ -34,4 +28,4 @@ async def main() -> None:
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    main()
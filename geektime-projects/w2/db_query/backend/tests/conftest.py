@@ -1,7 +1,6 @@
 """Pytest configuration and shared fixtures."""
 
 import pytest
-import asyncio
 from typing import AsyncGenerator, Generator
 import tempfile
 from pathlib import Path
@@ -9,14 +8,6 @@ from pathlib import Path
 from app.config import Settings
 
 
-@pytest.fixture
-def event_loop():
-    """Create an instance of the default event loop for the test session."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
-
-
 @pytest.fixture
 def temp_db_path() -> Generator[Path, None, None]:
     """Create a temporary database path for testing."""
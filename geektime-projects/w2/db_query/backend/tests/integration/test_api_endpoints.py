@@ -1,15 +1,28 @@
 """Integration tests for API endpoints."""
 
+from collections.abc import Generator
+
 import pytest
 from fastapi.testclient import TestClient
 
+from app.core.db import db_manager
 from app.main import app
 
 
-@pytest.fixture
-def client():
-    """Create a test client."""
-    return TestClient(app)
+@pytest.fixture(scope="module")
+def client(tmp_path_factory: pytest.TempPathFactory) -> Generator[TestClient, None, None]:
+    """Create a test client shared by the module.
+
+    Entering the client runs the app's startup and shutdown once for all
+    tests here, against a temporary metadata database.
+    """
+    db_manager.db_path = tmp_path_factory.mktemp("db") / "test.db"
+    try:
+        with TestClient(app) as test_client:
+            yield test_client
+    finally:
+        # Shutdown closed the connections, so the path can be reset
+        db_manager.db_path = None
 
 
 class TestDatabaseEndpoints:
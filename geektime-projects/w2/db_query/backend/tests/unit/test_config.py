@@ -7,7 +7,7 @@ from pathlib import Path
 import pytest
 from pydantic import ValidationError
 
-from app.config import Settings
+from app.config import Settings, get_settings
 
 
 def test_settings_default_values():
@@ -71,3 +71,28 @@ def test_settings_get_llm_api_key(monkeypatch):
     monkeypatch.delenv("OPENAI_API_KEY")
     settings = Settings()
     assert settings.get_llm_api_key() is None
+
+
+def test_settings_db_probe_timeout(monkeypatch):
+    """Test the connection probe timeout default and env override."""
+    assert Settings().db_probe_timeout == 3.0
+
+    monkeypatch.setenv("DB_PROBE_TIMEOUT", "1.5")
+    assert Settings().db_probe_timeout == 1.5
+
+
+def test_get_settings_is_cached(monkeypatch, tmp_path):
+    """Test that get_settings shares one instance until its cache is cleared."""
+    monkeypatch.setenv("DATABASE_PATH", str(tmp_path / "test.db"))
+    get_settings.cache_clear()
+    try:
+        settings = get_settings()
+        assert get_settings() is settings
+
+        monkeypatch.setenv("LLM_MODEL", "gpt-4")
+        assert get_settings().llm_model == settings.llm_model
+
+        get_settings.cache_clear()
+        assert get_settings().llm_model == "gpt-4"
+    finally:
+        get_settings.cache_clear()
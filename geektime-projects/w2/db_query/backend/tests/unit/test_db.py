@@ -0,0 +1,32 @@
+"""Unit tests for the SQLite database manager."""
+
+from pathlib import Path
+
+import pytest
+
+from app.core.db import DatabaseManager
+
+
+class TestDatabasePath:
+    """Tests for DatabaseManager.db_path."""
+
+    async def test_path_can_change_before_open(self, temp_db_path: Path):
+        """Test that the path can be redirected while no connection is open."""
+        manager = DatabaseManager(temp_db_path.with_name("first.db"))
+        manager.db_path = temp_db_path
+        await manager.initialize_database()
+        try:
+            assert temp_db_path.exists()
+        finally:
+            await manager.close()
+
+    async def test_path_change_refused_while_open(self, temp_db_path: Path):
+        """Test that an open manager refuses to switch files."""
+        manager = DatabaseManager(temp_db_path)
+        await manager.open()
+        try:
+            with pytest.raises(RuntimeError):
+                manager.db_path = temp_db_path.with_name("other.db")
+        finally:
+            await manager.close()
+        manager.db_path = None
@@ -0,0 +1,36 @@
+"""Unit tests for ETag helpers."""
+
+from app.utils.http_cache import etag_matches, make_etag
+
+
+class TestMakeEtag:
+    """Tests for make_etag function."""
+
+    def test_same_parts_same_etag(self):
+        """Test that the ETag is deterministic and quoted."""
+        etag = make_etag("db", "SELECT 1 LIMIT 1000")
+        assert etag == make_etag("db", "SELECT 1 LIMIT 1000")
+        assert etag.startswith('"') and etag.endswith('"')
+
+    def test_different_parts_different_etag(self):
+        """Test that the database name is part of the ETag."""
+        assert make_etag("a", "SELECT 1") != make_etag("b", "SELECT 1")
+
+
+class TestEtagMatches:
+    """Tests for etag_matches function."""
+
+    def test_missing_header(self):
+        """Test that no header never matches."""
+        assert etag_matches(None, '"abc"') is False
+
+    def test_exact_and_weak_match(self):
+        """Test exact, weak and listed ETags."""
+        assert etag_matches('"abc"', '"abc"') is True
+        assert etag_matches('W/"abc"', '"abc"') is True
+        assert etag_matches('"x", "abc"', '"abc"') is True
+        assert etag_matches('"x"', '"abc"') is False
+
+    def test_wildcard(self):
+        """Test that * matches any ETag."""
+        assert etag_matches("*", '"abc"') is True
@@ -0,0 +1,98 @@
+"""Unit tests for LLM service SQL validation."""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.llm_service import LLMService
+
+
+class FakeStream:
+    """Minimal async chat completion stream yielding fixed deltas."""
+
+    def __init__(self, deltas: list[str]):
+        self.deltas = deltas
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return None
+
+    async def __aiter__(self):
+        for delta in self.deltas:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+
+
+def make_service(deltas: list[str]) -> LLMService:
+    """Create an LLMService whose client streams the given deltas."""
+
+    async def create(**kwargs):
+        return FakeStream(deltas)
+
+    async def no_metadata(database_name):
+        return None
+
+    service = LLMService()
+    service.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    service._get_database_metadata = no_metadata
+    return service
+
+
+@pytest.mark.asyncio
+class TestValidateGeneratedSQL:
+    """Tests for LLMService._validate_generated_sql."""
+
+    async def test_select_accepted(self):
+        """Test that a SELECT parses cleanly (guards the sqlglot ErrorLevel lookup)."""
+        is_valid, error, parsed = await LLMService()._validate_generated_sql("SELECT id FROM users")
+        assert (is_valid, error) == (True, "")
+        assert parsed is not None
+
+    async def test_dialect_specific_syntax(self):
+        """Test that MySQL identifiers parse with the MySQL dialect."""
+        is_valid, _, _ = await LLMService()._validate_generated_sql("SELECT `id` FROM `users`", "mysql")
+        assert is_valid is True
+
+    async def test_non_select_rejected(self):
+        """Test that data-modifying statements are rejected."""
+        is_valid, error, _ = await LLMService()._validate_generated_sql("DELETE FROM users")
+        assert is_valid is False
+        assert "SELECT" in error
+
+    async def test_comment_prefix_does_not_backtrack(self):
+        """Test that stacked comment markers in model output are rejected quickly."""
+        start = time.perf_counter()
+        is_valid, _, _ = await LLMService()._validate_generated_sql("-- " * 5000 + "x")
+        assert time.perf_counter() - start < 1
+        assert is_valid is False
+
+    async def test_syntax_error_reported(self):
+        """Test that unparseable SQL is reported as a syntax error."""
+        is_valid, error, _ = await LLMService()._validate_generated_sql("SELECT FROM WHERE")
+        assert is_valid is False
+        assert "语法错误" in error
+
+
+@pytest.mark.asyncio
+class TestGenerateSQL:
+    """Tests for LLMService.generate_sql with a fake client."""
+
+    async def test_limit_injected_despite_limit_like_column(self):
+        """Test that a column named like LIMIT does not suppress LIMIT injection."""
+        service = make_service(["```sql\n", "SELECT time_limit ", "FROM plans", "\n```"])
+        result = await service.generate_sql("db", "plans")
+        assert result.sql == "SELECT time_limit FROM plans LIMIT 1000"
+
+    async def test_existing_limit_kept(self):
+        """Test that SQL with a LIMIT is returned unchanged."""
+        service = make_service(["SELECT id FROM users LIMIT 5"])
+        result = await service.generate_sql("db", "users")
+        assert result.sql == "SELECT id FROM users LIMIT 5"
+
+    async def test_non_select_rejected_early(self):
+        """Test that a non-SELECT completion is rejected."""
+        service = make_service(["DROP TABLE ", "users"])
+        with pytest.raises(ValueError, match="SELECT"):
+            await service.generate_sql("db", "drop users")
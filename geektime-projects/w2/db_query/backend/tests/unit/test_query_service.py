@@ -0,0 +1,20 @@
+"""Unit tests for the query result cache."""
+
+from app.services.query_service import invalidate_query_results, query_result_cache
+
+
+class TestInvalidateQueryResults:
+    """Tests for invalidate_query_results function."""
+
+    def test_drops_only_named_database(self):
+        """Test that only the named database's results are dropped."""
+        query_result_cache["shop", "SELECT 1"] = ('"a"', "{}")
+        query_result_cache["shop", "SELECT 2"] = ('"b"', "{}")
+        query_result_cache["crm", "SELECT 1"] = ('"a"', "{}")
+
+        invalidate_query_results("shop")
+
+        assert ("shop", "SELECT 1") not in query_result_cache
+        assert ("shop", "SELECT 2") not in query_result_cache
+        assert ("crm", "SELECT 1") in query_result_cache
+        invalidate_query_results("crm")
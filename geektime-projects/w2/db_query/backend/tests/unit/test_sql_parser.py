@@ -1,75 +1,137 @@
 """Unit tests for SQL parsing and validation."""
 
+import time
+
 import pytest
 
 from app.core.sql_parser import (
     validate_and_transform_sql,
     is_select_query,
+    parse_sql,
     ValidationResult,
 )
 
 
+@pytest.mark.asyncio
 class TestValidateAndTransformSQL:
     """Tests for validate_and_transform_sql function."""
 
-    def test_validate_select_query(self):
+    async def test_validate_select_query(self):
         """Test that SELECT queries are valid."""
-        result = validate_and_transform_sql("SELECT * FROM users")
+        result = await validate_and_transform_sql("SELECT * FROM users")
         assert result.is_valid is True
         assert result.error is None
         # Note: LIMIT injection behavior may vary based on sqlglot version
         # Just check that it's valid SQL
 
-    def test_validate_select_with_limit(self):
+    async def test_validate_select_with_limit(self):
         """Test that SELECT with existing LIMIT is preserved."""
-        result = validate_and_transform_sql("SELECT * FROM users LIMIT 10")
+        result = await validate_and_transform_sql("SELECT * FROM users LIMIT 10")
         assert result.is_valid is True
         assert result.error is None
         assert "LIMIT 10" in result.sql.upper()
 
-    def test_validate_select_with_where(self):
+    async def test_validate_select_with_where(self):
         """Test that SELECT with WHERE is valid."""
-        result = validate_and_transform_sql("SELECT * FROM users WHERE id = 1")
+        result = await validate_and_transform_sql("SELECT * FROM users WHERE id = 1")
         assert result.is_valid is True
         assert result.error is None
         assert "WHERE" in result.sql.upper()
 
-    def test_validate_insert_query_rejected(self):
+    async def test_validate_insert_query_rejected(self):
         """Test that INSERT queries are rejected."""
-        result = validate_and_transform_sql("INSERT INTO users VALUES (1, 'test')")
+        result = await validate_and_transform_sql("INSERT INTO users VALUES (1, 'test')")
         assert result.is_valid is False
         assert "仅允许 SELECT" in result.error
 
-    def test_validate_update_query_rejected(self):
+    async def test_validate_update_query_rejected(self):
         """Test that UPDATE queries are rejected."""
-        result = validate_and_transform_sql("UPDATE users SET name = 'test'")
+        result = await validate_and_transform_sql("UPDATE users SET name = 'test'")
         assert result.is_valid is False
         assert "仅允许 SELECT" in result.error
 
-    def test_validate_delete_query_rejected(self):
+    async def test_validate_delete_query_rejected(self):
         """Test that DELETE queries are rejected."""
-        result = validate_and_transform_sql("DELETE FROM users")
+        result = await validate_and_transform_sql("DELETE FROM users")
         assert result.is_valid is False
         assert "仅允许 SELECT" in result.error
 
-    def test_validate_drop_query_rejected(self):
+    async def test_validate_drop_query_rejected(self):
         """Test that DROP queries are rejected."""
-        result = validate_and_transform_sql("DROP TABLE users")
+        result = await validate_and_transform_sql("DROP TABLE users")
         assert result.is_valid is False
         assert "仅允许 SELECT" in result.error
 
-    def test_validate_invalid_sql(self):
+    async def test_validate_invalid_sql(self):
         """Test that invalid SQL is rejected."""
-        result = validate_and_transform_sql("INVALID SQL QUERY")
+        result = await validate_and_transform_sql("INVALID SQL QUERY")
         assert result.is_valid is False
         assert "语法错误" in result.error or "解析错误" in result.error
 
-    def test_limit_injection(self):
+    async def test_limit_injection(self):
         """Test that LIMIT is automatically injected."""
-        result = validate_and_transform_sql("SELECT * FROM users")
+        result = await validate_and_transform_sql("SELECT * FROM users")
         assert result.is_valid is True
         # The SQL should be valid (may or may not have LIMIT depending on implementation)
         assert "SELECT" in result.sql.upper()
+        assert "LIMIT 1000" in result.sql.upper()
+
+    async def test_limit_injection_keeps_parsed_sql_intact(self):
+        """Test that injecting LIMIT does not modify the shared parsed AST."""
+        await validate_and_transform_sql("SELECT name FROM users")
+        assert parse_sql("SELECT name FROM users").args.get("limit") is None
+
+    async def test_multiple_statements_with_limit_rejected(self):
+        """Test that a trailing LIMIT does not let extra statements through."""
+        result = await validate_and_transform_sql("SELECT 1; DROP TABLE users; SELECT 1 LIMIT 5")
+        assert result.is_valid is False
+
+    async def test_existing_limit_keeps_sql_text(self):
+        """Test that SQL with its own LIMIT is passed through unchanged."""
+        sql = "SELECT x::int, now() - interval '1 day' FROM t LIMIT 5 OFFSET 2"
+        result = await validate_and_transform_sql(sql, dialect="postgres")
+        assert result.is_valid is True
+        assert result.sql == sql
+
+    async def test_mysql_dialect_limit_injection(self):
+        """Test that MySQL identifiers survive validation in the MySQL dialect."""
+        result = await validate_and_transform_sql("SELECT `order` FROM `shop`", dialect="mysql")
+        assert result.is_valid is True
+        assert result.sql == "SELECT `order` FROM `shop` LIMIT 1000"
+
+    async def test_union_with_limit_rejected(self):
+        """Test that a trailing LIMIT does not bypass the SELECT type check."""
+        with_limit = await validate_and_transform_sql("SELECT 1 UNION SELECT 2 LIMIT 5")
+        without_limit = await validate_and_transform_sql("SELECT 1 UNION SELECT 2")
+        assert with_limit.is_valid is False
+        assert without_limit.is_valid is False
+
+    async def test_malformed_select_with_limit_rejected(self):
+        """Test that malformed SQL ending in LIMIT still reports a syntax error."""
+        result = await validate_and_transform_sql("SELECT FROM WHERE LIMIT 5")
+        assert result.is_valid is False
+        assert "语法错误" in result.error
+
+    async def test_repeated_sql_uses_cache(self):
+        """Test that repeated validation returns the cached result."""
+        first = await validate_and_transform_sql("SELECT id FROM users")
+        second = await validate_and_transform_sql("  SELECT id FROM users  ")
+        assert first is second
+
+    async def test_comment_prefix_does_not_backtrack(self):
+        """Test that stacked comment markers are rejected in linear time."""
+        start = time.perf_counter()
+        result = await validate_and_transform_sql("-- " * 5000 + "x")
+        assert time.perf_counter() - start < 1
+        assert result.is_valid is False
+
+    async def test_commented_write_rejected_without_parsing(self):
+        """Test that a write behind leading comments is rejected by the prefix check."""
+        misses = parse_sql.cache_info().misses
+        result = await validate_and_transform_sql("-- cleanup\n/* old rows */ DELETE FROM users")
+        assert result.is_valid is False
+        assert "仅允许 SELECT" in result.error
+        assert parse_sql.cache_info().misses == misses
 
 
 class TestIsSelectQuery:
@@ -103,6 +165,29 @@ class TestIsSelectQuery:
         """Test that invalid SQL returns False."""
         assert is_select_query("INVALID QUERY") is False
 
+    def test_write_rejected_without_parsing(self):
+        """Test that a write statement is rejected by the prefix check alone."""
+        misses = parse_sql.cache_info().misses
+        assert is_select_query("  DROP TABLE users") is False
+        assert parse_sql.cache_info().misses == misses
+
+    def test_non_select_start_rejected_without_parsing(self):
+        """Test that input not opening with SELECT or WITH skips sqlglot."""
+        misses = parse_sql.cache_info().misses
+        assert is_select_query("EXPLAIN SELECT 1") is False
+        assert is_select_query("VALUES (1)") is False
+        assert parse_sql.cache_info().misses == misses
+
+    def test_comment_prefix_does_not_backtrack(self):
+        """Test that stacked comment markers are rejected in linear time."""
+        start = time.perf_counter()
+        assert is_select_query("-- " * 5000 + "x") is False
+        assert time.perf_counter() - start < 1
+
+    def test_commented_cte_is_select(self):
+        """Test that a CTE behind a leading comment still reaches the parser."""
+        assert is_select_query("-- report\nWITH a AS (SELECT 1) SELECT * FROM a") is True
+
 
 class TestValidationResult:
     """Tests for ValidationResult model."""
@@ -213,12 +213,12 @@ export const QueryResult: React.FC<QueryResultProps> = ({
           <tbody className="bg-white divide-y divide-gray-200">
             {paginatedRows.map((row, idx) => (
               <tr key={idx} className="hover:bg-gray-50">
-                {result.columns.map((column) => (
+                {result.columns.map((column, colIdx) => (
                   <td
                     key={column}
                     className="px-4 py-3 whitespace-nowrap text-sm text-gray-900"
                   >
-                    {formatValue(row[column])}
+                    {formatValue(row[colIdx])}
                   </td>
                 ))}
               </tr>
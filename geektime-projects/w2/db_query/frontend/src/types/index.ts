@@ -37,9 +37,10 @@ export interface DatabaseMetadataResponse {
 
 export interface QueryResult {
   columns: string[];
-  rows: Record<string, unknown>[];
+  rows: unknown[][];
   rowCount: number;
   executionTimeMs: number;
+  truncated?: boolean;
 }
 
 export interface ErrorResponse {
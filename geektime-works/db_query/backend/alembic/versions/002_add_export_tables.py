@@ -44,12 +44,15 @@ def upgrade() -> None:
         sa.PrimaryKeyConstraint('id'),
         sa.UniqueConstraint('task_id'),
     )
-    op.create_index('idx_exporttasks_user_id', 'exporttasks', ['user_id'], unique=False)
-    op.create_index('idx_exporttasks_database_name', 'exporttasks', ['database_name'], unique=False)
-    op.create_index('idx_exporttasks_status', 'exporttasks', ['status'], unique=False)
-    op.create_index('idx_exporttasks_task_id', 'exporttasks', ['task_id'], unique=False)
-    op.create_index('idx_exporttasks_created_at', 'exporttasks', ['created_at'], unique=False)
-    op.create_index('idx_exporttasks_started_at', 'exporttasks', ['started_at'], unique=False)
+    # Indexes are emitted together per table; index-only batches never
+    # trigger SQLite's copy-and-move table recreation
+    with op.batch_alter_table('exporttasks') as batch_op:
+        batch_op.create_index('idx_exporttasks_user_id', ['user_id'], unique=False)
+        batch_op.create_index('idx_exporttasks_database_name', ['database_name'], unique=False)
+        batch_op.create_index('idx_exporttasks_status', ['status'], unique=False)
+        batch_op.create_index('idx_exporttasks_task_id', ['task_id'], unique=False)
+        batch_op.create_index('idx_exporttasks_created_at', ['created_at'], unique=False)
+        batch_op.create_index('idx_exporttasks_started_at', ['started_at'], unique=False)
 
     # AI suggestion analytics table
     op.create_table(
@@ -70,9 +73,10 @@ def upgrade() -> None:
         sa.PrimaryKeyConstraint('id'),
         sa.UniqueConstraint('suggestion_id'),
     )
-    op.create_index('idx_aisuggestionanalytics_database_name', 'aisuggestionanalytics', ['database_name'], unique=False)
-    op.create_index('idx_aisuggestionanalytics_user_response', 'aisuggestionanalytics', ['user_response'], unique=False)
-    op.create_index('idx_aisuggestionanalytics_suggested_at', 'aisuggestionanalytics', ['suggested_at'], unique=False)
+    with op.batch_alter_table('aisuggestionanalytics') as batch_op:
+        batch_op.create_index('idx_aisuggestionanalytics_database_name', ['database_name'], unique=False)
+        batch_op.create_index('idx_aisuggestionanalytics_user_response', ['user_response'], unique=False)
+        batch_op.create_index('idx_aisuggestionanalytics_suggested_at', ['suggested_at'], unique=False)
 
 
 def downgrade() -> None: